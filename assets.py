@@ -0,0 +1,118 @@
+"""
+Fonts, rendered text and cell images shared by everything that draws with pygame.
+
+Each font is looked up once, and rendered text surfaces are cached by their
+string, size and colors so a string that is shown again is not rendered again.
+The text cache is bounded and drops the least recently used surface first.
+
+The font file comes from PYSNAKE_FONT, or else the first .ttf file in the
+fonts directory next to this file.  Only without either is FONT_NAME looked up
+among the system fonts, which means scanning them; preload_font starts that
+scan in the background so it can run while the display is set up.
+
+Every cell of one color is drawn from the same surface, converted to the pixel
+format of the display so blitting it needs no conversion.
+"""
+import os
+import threading
+import pygame
+from collections import OrderedDict
+
+
+FONT_NAME = 'Couriernew'
+FONT_ENV = 'PYSNAKE_FONT' # set to a font file to use it instead of looking FONT_NAME up
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+TEXT_CACHE_SIZE = 256
+
+_fonts = {}
+_cells = {}
+_font_file = [] # the resolved font file, None for pygame's default font, once it is known
+_font_lookup = None # thread looking the font file up, from preload_font
+
+def find_font_file():
+    """Returns the font file to use: PYSNAKE_FONT, a bundled one or FONT_NAME from the system, or None"""
+    path = os.environ.get(FONT_ENV)
+    if path:
+        return path
+    if os.path.isdir(FONT_DIR):
+        for name in sorted(os.listdir(FONT_DIR)):
+            if name.lower().endswith('.ttf'):
+                return os.path.join(FONT_DIR, name)
+    return pygame.font.match_font(FONT_NAME)
+
+def preload_font():
+    """Starts looking up the font file in the background, unless it is known already"""
+    global _font_lookup
+    if _font_file or _font_lookup is not None:
+        return
+    _font_lookup = threading.Thread(target=lambda: _font_file.append(find_font_file()))
+    _font_lookup.daemon = True
+    _font_lookup.start()
+
+def font_file():
+    """Returns the font file, waiting for preload_font's lookup or doing it now"""
+    if not _font_file and _font_lookup is not None:
+        _font_lookup.join()
+    if not _font_file: # not looked up yet, or the lookup failed
+        _font_file.append(find_font_file())
+    return _font_file[0]
+
+def get_font(size, bold=False):
+    """Returns the game font at the given size, loading it the first time it is asked for"""
+    key = (size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(font_file(), size)
+        font.set_bold(bold)
+        _fonts[key] = font
+    return font
+
+class TextCache:
+    """Least recently used cache of rendered text surfaces"""
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, size, color, background=None, bold=False):
+        key = (text, size, color, background, bold)
+        surface = self.surfaces.pop(key, None)
+        if surface is None:
+            self.misses += 1
+            font = get_font(size, bold)
+            if background is None:
+                surface = font.render(text, True, color)
+            else:
+                surface = font.render(text, True, color, background)
+            if len(self.surfaces) >= self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.hits += 1
+        self.surfaces[key] = surface # most recently used goes last
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+text_cache = TextCache()
+
+def render_text(text, size, color, background=None, bold=False):
+    """Renders text with the game font through the shared cache; the surface must not be changed by the caller"""
+    return text_cache.render(text, size, color, background, bold)
+
+def get_cell(color, width, height):
+    """Returns the shared surface for a cell of the given color, in the display's pixel format once a mode is set"""
+    key = (color, width, height)
+    cell = _cells.get(key)
+    if cell is None:
+        cell = pygame.Surface((width, height))
+        cell.fill(color)
+        if pygame.display.get_surface() is not None:
+            cell = cell.convert()
+        _cells[key] = cell
+    return cell
+
+def clear_cells():
+    """Forgets the cell surfaces, needed after the display mode changes"""
+    _cells.clear()
@@ -0,0 +1,281 @@
+"""
+Many PySnake games stepped at once with NumPy.
+
+BatchArena holds a batch of independent arenas of the same size and number of
+snakes as stacked arrays: one occupancy grid per arena with the same cell
+codes as engine.Arena, and per snake a ring buffer of the grid indices of its
+body, its length, growth, direction, points and whether it is alive.  step()
+advances every game by one tick from an array of direction indices, with the
+rules of Arena.tick: all snakes move, then each snake in turn loses on a wall
+or a snake (taking the snake whose head got there first this tick with it),
+or claims the cell and eats the food on it.  New food goes down for every
+snake that ate, in order, once all the heads have claimed their cells.  Work is done for all arenas at once and only
+loops over the snakes of a game.
+
+Food goes on an empty cell chosen uniformly at random, as Arena.make_food
+does, but from one NumPy generator for the whole batch, so a batch with a
+given seed does not repeat the games of an Arena with the same seed.
+
+    python batch.py --arenas 4096 --players 2 --ticks 1000
+"""
+import argparse
+import time
+
+import numpy
+
+from engine import Arena, DIRECTIONS, EMPTY, FOOD, SNAKE_CODE, FOOD_POINTS, new_seed
+
+
+ROW_STEPS = numpy.array([direction[0] for direction in DIRECTIONS])
+COL_STEPS = numpy.array([direction[1] for direction in DIRECTIONS])
+FOOD_TRIES = 8 # random cells tried for food before choosing among the empty cells of the arena directly
+
+class BatchArena:
+    def __init__(self, count, grid_size, option, points=None, seed=None):
+        self.count = count # number of arenas
+        self.grid_size = grid_size # tuple of (row, col)
+        self.option = option # number of snakes in each arena
+        self.cells = grid_size[0] * grid_size[1]
+        self.seed = new_seed() if seed is None else seed
+        self.rng = numpy.random.RandomState(seed_words(self.seed))
+        self.capacity = self.cells + 1 # a snake covers at most every cell, plus the head it loses with
+        index_type = numpy.int16 if self.capacity <= numpy.iinfo(numpy.int16).max else numpy.int32
+
+        # the snakes start where they do in an Arena; its food is left out
+        start = Arena(grid_size, option, [0] * option, 0)
+        self.start_grid = numpy.zeros(self.cells, dtype=numpy.uint8)
+        self.start_body = numpy.zeros((option, max(len(snake.body_parts) for snake in start.snakes)), dtype=index_type)
+        self.start_length = numpy.zeros(option, dtype=numpy.int64)
+        self.start_direction = numpy.zeros(option, dtype=numpy.int8)
+        for p, snake in enumerate(start.snakes):
+            indices = [start.cell_index(part.row, part.col) for part in reversed(snake.body_parts)]
+            self.start_grid[indices] = snake.code
+            self.start_body[p, :len(indices)] = indices # tail first, so the head is at slot length - 1
+            self.start_length[p] = len(indices)
+            self.start_direction[p] = DIRECTIONS.index(snake.direction)
+
+        self.grid = numpy.zeros((count, self.cells), dtype=numpy.uint8) # occupancy of every cell of every arena
+        self.body = numpy.zeros((count, option, self.capacity), dtype=index_type) # grid index of each part, a ring
+        self.head = numpy.zeros((count, option), dtype=numpy.int64) # slot of the head in body
+        self.length = numpy.zeros((count, option), dtype=numpy.int64)
+        self.grow = numpy.zeros((count, option), dtype=numpy.int64) # moves left that keep the tail where it is
+        self.direction = numpy.zeros((count, option), dtype=numpy.int8) # index into DIRECTIONS
+        self.points = numpy.zeros((count, option), dtype=numpy.int64)
+        self.alive = numpy.zeros((count, option), dtype=bool)
+        self.reset(points=points)
+
+    """
+    Starts new games in the given arenas, all of them by default, with the given points for the snakes
+    The snakes start as in a new Arena and (option-1)*4 + 1 pieces of food are put down
+    If a seed is given the generator of the batch starts over from it first
+    """
+    def reset(self, arenas=None, points=None, seed=None):
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed_words(seed))
+        if arenas is None:
+            arenas = numpy.arange(self.count)
+        else:
+            arenas = numpy.asarray(arenas, dtype=numpy.int64).reshape(-1)
+        self.grid[arenas] = self.start_grid
+        self.body[arenas, :, :self.start_body.shape[1]] = self.start_body # slots past the length are never read
+        self.head[arenas] = self.start_length - 1
+        self.length[arenas] = self.start_length
+        self.grow[arenas] = 0
+        self.direction[arenas] = self.start_direction
+        self.points[arenas] = 0 if points is None else points
+        self.alive[arenas] = True
+        for _ in xrange((self.option - 1) * 4 + 1):
+            self.place_food(arenas)
+
+    """
+    Puts one piece of food in each of the given arenas, which are all different, on an empty cell chosen
+    uniformly at random; an arena whose board is full gets none
+    A few random cells are tried first, which almost always finds an empty one while the boards are not crowded
+    """
+    def place_food(self, arenas):
+        grid = self.grid
+        pending = arenas
+        for _ in xrange(FOOD_TRIES):
+            if not len(pending):
+                return
+            cells = self.rng.randint(0, self.cells, len(pending))
+            empty = grid[pending, cells] == EMPTY
+            grid[pending[empty], cells[empty]] = FOOD
+            pending = pending[~empty]
+        for arena in pending:
+            free = numpy.flatnonzero(grid[arena] == EMPTY)
+            if len(free):
+                grid[arena, free[self.rng.randint(len(free))]] = FOOD
+
+    def alive_count(self):
+        return self.alive.sum(axis=1)
+
+    def game_over(self):
+        """Returns for each arena whether its game is over, as in Arena.game_over; those arenas are not stepped"""
+        alive = self.alive_count()
+        return (alive == 0) | ((alive == 1) & (self.option > 1))
+
+    def winner(self):
+        """Returns for each arena the index of the last snake left if the game is over, or -1"""
+        if self.option < 2:
+            return numpy.full(self.count, -1, dtype=numpy.int64)
+        return numpy.where(self.alive_count() == 1, self.alive.argmax(axis=1), -1)
+
+    """
+    Advances every game that is not over by one tick, moving snake p of arena b in DIRECTIONS[directions[b, p]]
+    Returns a boolean array of the snakes that lost in this tick, indexed [arena, snake]
+    """
+    def step(self, directions):
+        rows, cols = self.grid_size
+        cells = self.cells
+        capacity = self.capacity
+        option = self.option
+        # flat views: cell i of arena b is at b * cells + i, snake p of arena b is at b * option + p
+        grid = self.grid.reshape(-1)
+        body = self.body.reshape(-1)
+        heads = self.head.reshape(-1)
+        lengths = self.length.reshape(-1)
+        grow = self.grow.reshape(-1)
+        alive = self.alive.reshape(-1)
+
+        # move every snake: a new head in front, and the tail taken off unless it is growing
+        moving = numpy.flatnonzero((self.alive & ~self.game_over()[:, None]).reshape(-1))
+        arenas, players = numpy.divmod(moving, option)
+        direction = numpy.asarray(directions).reshape(-1)[moving]
+        self.direction.reshape(-1)[moving] = direction
+        slot = heads[moving]
+        row, col = numpy.divmod(body[moving * capacity + slot], cols)
+        row += ROW_STEPS[direction]
+        col += COL_STEPS[direction]
+
+        growing = grow[moving] > 0
+        grown = moving[growing]
+        grow[grown] -= 1
+        lengths[grown] += 1
+        still = ~growing
+        tails = arenas[still] * cells + body[moving[still] * capacity + (slot[still] - lengths[moving[still]] + 1) % capacity]
+        grid[tails[grid[tails] == SNAKE_CODE + players[still]]] = EMPTY
+
+        inside = (row >= 0) & (row < rows) & (col >= 0) & (col < cols)
+        target = numpy.where(inside, row * cols + col, -1)
+        slot = (slot + 1) % capacity
+        heads[moving] = slot
+        body[moving * capacity + slot] = numpy.maximum(target, 0)
+
+        # resolve the snakes in order, then put food down for the ones that ate once every head has its cell
+        targets = numpy.full(alive.shape, -1, dtype=numpy.int64)
+        targets[moving] = target
+        claimed = numpy.zeros(alive.shape, dtype=bool)
+        losers = numpy.zeros(alive.shape, dtype=bool)
+        eaten = []
+        for p in xrange(option):
+            mine = players == p
+            snakes = moving[mine]
+            index = target[mine]
+            wall = index < 0
+            losers[snakes[wall]] = True
+            snakes = snakes[~wall]
+            index = index[~wall]
+            into = snakes - p # times option, the first snake of the arena
+            cell = grid[into / option * cells + index]
+
+            hit = cell >= SNAKE_CODE
+            losers[snakes[hit]] = True
+            others = into[hit] + cell[hit] - SNAKE_CODE
+            first = claimed[others] & (targets[others] == index[hit]) # two heads in one cell
+            losers[others[first]] = True
+
+            free = ~hit
+            snakes = snakes[free]
+            grid[into[free] / option * cells + index[free]] = SNAKE_CODE + p
+            claimed[snakes] = True
+            eaters = snakes[cell[free] == FOOD]
+            if len(eaters):
+                grow[eaters] += 1
+                self.points.reshape(-1)[eaters] += FOOD_POINTS
+                eaten.append(eaters)
+        for eaters in eaten:
+            self.place_food(eaters / option)
+
+        # take the losers off their boards, freeing the cells of their bodies that are still theirs
+        lost = numpy.flatnonzero(losers)
+        if len(lost):
+            alive[lost] = False
+            length = lengths[lost]
+            lost = numpy.repeat(lost, length)
+            back = numpy.arange(len(lost)) - numpy.repeat(numpy.cumsum(length) - length, length)
+            parts = lost / option * cells + body[lost * capacity + (heads[lost] - back) % capacity]
+            grid[parts[grid[parts] == SNAKE_CODE + lost % option]] = EMPTY
+        return losers.reshape(self.alive.shape)
+
+    def get_state(self, arena):
+        """
+        Returns the state of one arena in the form of Arena.get_state, without a random state: a list of
+        (alive, direction, points, grow, cells head first) for the snakes, the cells of a snake that lost left
+        empty, and a list of food cells
+        """
+        cols = self.grid_size[1]
+        snakes = []
+        for p in xrange(self.option):
+            cells = []
+            if self.alive[arena, p]:
+                slots = (self.head[arena, p] - numpy.arange(self.length[arena, p])) % self.capacity
+                cells = [divmod(int(index), cols) for index in self.body[arena, p, slots]]
+            snakes.append((bool(self.alive[arena, p]), DIRECTIONS[self.direction[arena, p]],
+                           int(self.points[arena, p]), int(self.grow[arena, p]), cells))
+        food = [divmod(int(index), cols) for index in numpy.flatnonzero(self.grid[arena] == FOOD)]
+        return None, snakes, food
+
+
+def seed_words(seed):
+    """Splits a seed of up to SEED_BITS bits into the 32 bit words RandomState takes"""
+    return [seed & 0xffffffff, seed >> 32]
+
+def random_directions(batch, rng):
+    """Returns a random direction for every snake of the batch that does not turn it back onto itself"""
+    turn = rng.randint(0, 3, batch.direction.shape)
+    back = batch.direction ^ 1 # DIRECTIONS comes in opposite pairs
+    return turn + (turn >= back)
+
+def run(ticks, count, option=2, grid_size=(40,40), seed=None):
+    """
+    Steps a batch of games with random directions for the given number of ticks, starting a new game in every
+    arena whose game is over
+    Returns a dictionary with the number of ticks, snake moves and games played and the moves per second
+    """
+    batch = BatchArena(count, grid_size, option, seed=seed)
+    rng = numpy.random.RandomState(batch.seed & 0xffffffff)
+    moves = 0
+    games = count
+    start = time.time()
+    for _ in xrange(ticks):
+        moves += int(numpy.count_nonzero(batch.alive))
+        batch.step(random_directions(batch, rng))
+        over = numpy.flatnonzero(batch.game_over())
+        if len(over):
+            batch.reset(over)
+            games += len(over)
+    seconds = time.time() - start
+    return {'ticks': ticks,
+            'moves': moves,
+            'games': games,
+            'seconds': seconds,
+            'moves_per_sec': moves / seconds if seconds > 0 else float('inf')}
+
+def main():
+    parser = argparse.ArgumentParser(description="Step a batch of PySnake games at once with NumPy")
+    parser.add_argument('--arenas', type=int, default=4096)
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=40)
+    parser.add_argument('--cols', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    stats = run(args.ticks, args.arenas, args.players, (args.rows, args.cols), args.seed)
+    print "%d ticks of %d arenas, %d games, %d snake moves in %.2fs (%.0f moves/sec)" % (
+        stats['ticks'], args.arenas, stats['games'], stats['moves'], stats['seconds'], stats['moves_per_sec'])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""
+Benchmarks for the arena operations, over board sizes, snake lengths and
+numbers of snakes.
+
+Each scenario lays its snakes out along a cycle that visits every cell of the
+board, spaced evenly, and steers them along it so they never collide.  For
+every scenario the ops per second of make_food, Snake.move, detect_collisions,
+Snake.add_unit and drawing a frame are measured, together with the memory the
+arena takes.  Drawing uses the SDL dummy video driver unless another one is
+set, so no display is needed.
+
+    python benchmark.py --out results.json
+    python benchmark.py --quick --compare results.json
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+from timeit import default_timer
+
+import pygame
+
+from engine import Arena, Body, snake_color
+from render import ArenaView, GridView, fit_cell, numpy
+
+
+GRID_SIZES = [40, 200, 1000, 2000]
+SNAKE_LENGTHS = [10, 1000, 100000]
+SNAKE_COUNTS = [1, 2, 8, 64]
+QUICK_GRID_SIZES = [40, 200]
+QUICK_SNAKE_LENGTHS = [10, 1000]
+QUICK_SNAKE_COUNTS = [1, 2, 8]
+MAX_FILL = 0.5 # scenarios whose snakes would cover more of the board than this are skipped
+MIN_TIME = 0.2 # seconds each measurement runs for
+SCREEN_SIZE = (1920, 1080)
+REGRESSION = 0.8 # --compare reports ops that run at less than this fraction of the old speed
+DEFAULT_OUT = 'benchmark.json'
+
+
+def cycle_cell(i, rows, cols):
+    """
+    Returns cell i of a cycle through every cell of a board with an even number of rows:
+    along row 0, back and forth over columns 1 and up on the other rows, then up column 0
+    """
+    i %= rows * cols
+    if i < cols:
+        return (0, i)
+    i -= cols
+    if i < (rows - 1) * (cols - 1):
+        row = 1 + i / (cols - 1)
+        j = i % (cols - 1)
+        if row % 2 == 1:
+            return (row, cols - 1 - j)
+        return (row, 1 + j)
+    i -= (rows - 1) * (cols - 1)
+    return (rows - 1 - i, 0)
+
+def cycle_direction(row, col, rows, cols):
+    """Returns the direction from a cell to the next one on the cycle of cycle_cell"""
+    if col == 0:
+        if row > 0:
+            return (-1, 0)
+        return (0, 1)
+    if row % 2 == 0:
+        if col < cols - 1:
+            return (0, 1)
+        return (1, 0)
+    if col > 1:
+        return (0, -1)
+    if row < rows - 1:
+        return (1, 0)
+    return (0, -1)
+
+def build_arena(size, count, length, seed=0):
+    """Returns a size x size arena without food holding count snakes of the given length spread along the cycle"""
+    arena = Arena((size, size), 0, [], seed, food=False)
+    spacing = size * size / count
+    for s in xrange(count):
+        head = s * spacing + length - 1
+        cells = [cycle_cell(head - k, size, size) for k in xrange(length)]
+        direction = cycle_direction(cells[0][0], cells[0][1], size, size)
+        arena.add_snake(cells, direction, snake_color(s), "S%d" % s)
+    return arena
+
+def steer(arena):
+    rows, cols = arena.grid_size
+    return [cycle_direction(snake.body_parts[0].row, snake.body_parts[0].col, rows, cols) for snake in arena.snakes]
+
+def measure(func, min_time=MIN_TIME, max_ops=None):
+    """Calls func, which returns how many operations it did, for min_time seconds; returns operations per second"""
+    ops = 0
+    start = default_timer()
+    elapsed = 0.0
+    while elapsed < min_time and (max_ops is None or ops < max_ops):
+        ops += func()
+        elapsed = default_timer() - start
+    return ops / elapsed
+
+def measure_ticks(arena, min_time=MIN_TIME):
+    """Steps the snakes along the cycle; returns snake moves per second for move_snakes and for detect_collisions"""
+    moving = 0.0
+    detecting = 0.0
+    ticks = 0
+    while moving + detecting < min_time:
+        directions = steer(arena)
+        start = default_timer()
+        arena.move_snakes(directions)
+        middle = default_timer()
+        arena.detect_collisions()
+        moving += middle - start
+        detecting += default_timer() - middle
+        ticks += 1
+    moves = ticks * len(arena.snakes)
+    return moves / moving, moves / detecting
+
+def arena_bytes(arena):
+    """Rough size of the arena state: grid, free cell arrays and body parts"""
+    parts = sum(len(snake.body_parts) for snake in arena.snakes) + len(arena.food)
+    size = len(arena.grid)
+    size += arena.free.itemsize * (len(arena.free) + len(arena.free_pos))
+    size += parts * (sys.getsizeof(Body(0, 0, None)) + 8) # each part plus its slot in the deque
+    return size
+
+def run_scenario(size, count, length, screen):
+    start = default_timer()
+    arena = build_arena(size, count, length)
+    result = {'grid': size, 'snakes': count, 'length': length,
+              'fill': float(count * length) / (size * size),
+              'build_seconds': default_timer() - start,
+              'arena_bytes': arena_bytes(arena),
+              'ops': {}}
+    ops = result['ops']
+
+    def food():
+        arena.remove_food(arena.make_food())
+        return 1
+    ops['make_food'] = measure(food)
+    ops['move'], ops['detect_collisions'] = measure_ticks(arena)
+
+    view = ArenaView(arena, 0, 0, 20)
+    def full_frame():
+        view.draw_all(screen)
+        return 1
+    ops['render_full'] = measure(full_frame)
+    def frame():
+        arena.tick(steer(arena))
+        view.draw_changes(screen)
+        view.draw_motion(screen, 0.5)
+        return 1
+    ops['render_frame'] = measure(frame)
+    if numpy is not None:
+        # scaled to the screen as make_view would, down to one pixel per cell
+        grid_view = GridView(arena, 0, 0, 20, max(1, fit_cell(arena.grid_size, screen.get_rect())))
+        def grid_frame():
+            grid_view.draw(screen)
+            return 1
+        ops['render_grid'] = measure(grid_frame)
+
+    # last, because the snake grows into the gap in front of it
+    snake = arena.snakes[0]
+    gap = size * size / count - length
+    def grow():
+        snake.add_unit()
+        snake.move(steer(arena)[0])
+        return 1
+    ops['add_unit'] = measure(grow, max_ops=gap)
+
+    result['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+def run(grid_sizes, snake_lengths, snake_counts, log=sys.stdout):
+    pygame.display.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE, 0, 32)
+    results = []
+    for size in grid_sizes:
+        for length in snake_lengths:
+            for count in snake_counts:
+                if count * length > MAX_FILL * size * size:
+                    continue
+                result = run_scenario(size, count, length, screen)
+                results.append(result)
+                log.write("%4dx%-4d %2d snakes of %6d: %s\n" % (size, size, count, length,
+                          ", ".join("%s %.0f/s" % (op, rate) for op, rate in sorted(result['ops'].iteritems()))))
+                log.flush()
+    pygame.display.quit()
+    return {'meta': {'python': platform.python_version(),
+                     'platform': platform.platform(),
+                     'pygame': pygame.version.ver,
+                     'numpy': numpy.__version__ if numpy is not None else None,
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                     'min_time': MIN_TIME},
+            'results': results}
+
+def compare(old, new, threshold=REGRESSION):
+    """Returns (scenario, op, old ops/sec, new ops/sec) for every op that got slower than threshold times the old speed"""
+    key = lambda result: (result['grid'], result['snakes'], result['length'])
+    old_results = dict((key(result), result) for result in old['results'])
+    slower = []
+    for result in new['results']:
+        before = old_results.get(key(result))
+        if before is None:
+            continue
+        for op, rate in sorted(result['ops'].iteritems()):
+            old_rate = before['ops'].get(op)
+            if old_rate and rate < threshold * old_rate:
+                slower.append((key(result), op, old_rate, rate))
+    return slower
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark arena operations without a display")
+    parser.add_argument('--quick', action='store_true', help="only the smaller boards and snakes")
+    parser.add_argument('--out', default=DEFAULT_OUT, help="file to save the results to as JSON")
+    parser.add_argument('--compare', metavar='OLD', help="results of an earlier run to check for regressions")
+    parser.add_argument('--threshold', type=float, default=REGRESSION,
+                        help="fraction of the old speed below which an op counts as a regression")
+    args = parser.parse_args()
+
+    if args.quick:
+        report = run(QUICK_GRID_SIZES, QUICK_SNAKE_LENGTHS, QUICK_SNAKE_COUNTS)
+    else:
+        report = run(GRID_SIZES, SNAKE_LENGTHS, SNAKE_COUNTS)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(json.load(f), report, args.threshold)
+        for (size, count, length), op, old_rate, rate in slower:
+            print "SLOWER %dx%d %d snakes of %d: %s %.0f/s -> %.0f/s" % (size, size, count, length, op, old_rate, rate)
+        if slower:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
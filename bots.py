@@ -0,0 +1,257 @@
+"""
+Computer players.
+
+A policy is a function policy(arena, snake, rng) that returns the direction
+the snake should move in next tick.  POLICIES names the ones the game and
+headless.py can pick; make_policy(name) returns a fresh one, since a PathBot
+keeps count of its decisions.
+
+PathBot heads for the nearest food along a shortest path found by an A*
+search over arena.grid, as long as a flood fill shows the first step
+leaves the snake as many free cells as it is long, and otherwise takes the
+move with the most room.  The search takes at most SEARCH_CELLS cells from
+its queue; food further away than that is headed for through the searched
+cell closest to it, so a move costs about the same on any board.  Each
+decision also gets a budget in microseconds.  The search looks at the clock
+every CHECK_CELLS cells and, once the budget is spent, gives up and uses
+greedy_policy, which only looks at the cells next to the head, so a slow
+moment of the machine cannot hold up the game loop.  A PathBot with no budget
+never looks at the clock, and its moves depend only on the board.
+"""
+import inspect
+from heapq import heappush, heappop
+from timeit import default_timer
+
+from engine import DIRECTIONS, FOOD, SNAKE_CODE, opposite_direction
+from fields import for_arena
+
+
+DECISION_BUDGET = 1000 # microseconds a PathBot may spend on one move
+CHECK_CELLS = 8 # cells searched between looks at the clock
+SEARCH_CELLS = 64 # most cells the search for food takes from its queue, so it fits the budget on any board
+FALLBACK_RESERVE = 100 # microseconds of the budget kept for the cells searched after the deadline and the fallback
+FIELD_BOT_CELLS = 100 * 100 # biggest board, in cells, that FieldBot keeps up with in a tick, see FieldBot.max_cells
+
+
+def safe_cell(arena, row, col):
+    """Returns true if a head moving to (row, col) would not hit a wall or a snake"""
+    return arena.in_bounds(row, col) and arena.cell_at(row, col) < SNAKE_CODE
+
+def safe_moves(arena, snake):
+    """Returns the directions, other than back, that do not move the snake into a wall or a snake"""
+    head = snake.body_parts[0]
+    choices = []
+    for direction in DIRECTIONS:
+        if opposite_direction(direction, snake.direction):
+            continue
+        if safe_cell(arena, head.row + direction[0], head.col + direction[1]):
+            choices.append(direction)
+    return choices
+
+def random_policy(arena, snake, rng):
+    """Picks a random direction that does not kill the snake, if there is one"""
+    choices = safe_moves(arena, snake)
+    if not choices:
+        return snake.direction
+    return rng.choice(choices)
+
+def greedy_policy(arena, snake, rng):
+    """Picks the safe direction that gets closest to a piece of food, counting steps as if nothing were in the way"""
+    choices = safe_moves(arena, snake)
+    if not choices:
+        return snake.direction
+    if not arena.food:
+        return rng.choice(choices)
+    head = snake.body_parts[0]
+    def distance(direction):
+        row = head.row + direction[0]
+        col = head.col + direction[1]
+        return min(abs(bite.row - row) + abs(bite.col - col) for bite in arena.food)
+    return min(choices, key=distance)
+
+
+class PathBot:
+    def __init__(self, budget=DECISION_BUDGET, fallback=greedy_policy):
+        if budget is None: # no deadline, the search is bounded by SEARCH_CELLS and the length of the snake alone
+            self.budget = self.search_time = float('inf')
+        else:
+            self.budget = budget / 1e6 # seconds
+            self.search_time = max(budget - FALLBACK_RESERVE, 0) / 1e6
+        self.fallback = fallback
+        self.decisions = 0
+        self.fallbacks = 0 # decisions that ran out of time
+        self.over_budget = 0 # decisions that took longer than the budget, fallback and all
+        self.slowest = 0.0 # seconds the longest decision took
+
+    def __call__(self, arena, snake, rng):
+        start = default_timer()
+        direction = self.search(arena, snake, start + self.search_time)
+        if direction is None:
+            direction = self.fallback(arena, snake, rng)
+            self.fallbacks += 1
+        self.decisions += 1
+        elapsed = default_timer() - start
+        if elapsed > self.budget:
+            self.over_budget += 1
+        self.slowest = max(self.slowest, elapsed)
+        return direction
+
+    """
+    Returns the direction to move in, or None if the deadline passed first
+    Cells of snakes count as walls, even tails that will have moved on by the time the snake gets there
+    """
+    def search(self, arena, snake, deadline):
+        moves = [] # (direction, grid index) of every safe move
+        head = snake.body_parts[0]
+        for direction in safe_moves(arena, snake):
+            moves.append((direction, arena.cell_index(head.row + direction[0], head.col + direction[1])))
+        if not moves:
+            return snake.direction
+        if len(moves) == 1:
+            return moves[0][0]
+
+        room = len(snake.body_parts) # free cells to be safe in
+        step = self.path_to_food(arena, head, moves, deadline)
+        if step is False:
+            return None
+        if step is not None:
+            space = self.space(arena, moves[step][1], room, deadline)
+            if space is None:
+                return None
+            if space >= room:
+                return moves[step][0]
+        best = None
+        best_space = -1
+        for i, (direction, index) in enumerate(moves):
+            space = self.space(arena, index, room, deadline)
+            if space is None:
+                return None
+            if space > best_space or (space == best_space and i == step):
+                best = direction
+                best_space = space
+        return best
+
+    """
+    A* search from the cells of the safe moves to food, guided by the distance to the food closest to the head
+    counted as if nothing were in the way, and ending at whichever food it reaches first
+    Returns the position in moves of the first step toward it, None if no food can be reached, or False if the
+    deadline passed
+    Food further away than SEARCH_CELLS cells can take is headed for through the cell searched that is closest
+    to it, so the search costs the same on a board of any size
+    """
+    def path_to_food(self, arena, head, moves, deadline):
+        grid = arena.grid
+        cols = arena.grid_size[1]
+        last = len(grid) - cols # first index of the bottom row
+        if not arena.food:
+            return None
+        target = min(arena.food, key=lambda bite: abs(bite.row - head.row) + abs(bite.col - head.col))
+        food_row, food_col = target.row, target.col
+        def estimate(index):
+            return abs(index // cols - food_row) + abs(index % cols - food_col)
+        first = {} # grid index -> position in moves of the first step of the path to it
+        heap = []
+        for i, (direction, index) in enumerate(moves):
+            if grid[index] == FOOD:
+                return i
+            first[index] = i
+            heappush(heap, (1 + estimate(index), -1, index))
+        n = 0
+        closest = None # (estimate, grid index) of the searched cell closest to food
+        while heap:
+            total, steps, index = heappop(heap) # steps is negative, so ties go to the cell furthest along
+            n += 1
+            if n % CHECK_CELLS == 0 and default_timer() > deadline:
+                return False
+            if closest is None or total + steps < closest[0]:
+                closest = (total + steps, index)
+            if n == SEARCH_CELLS:
+                return first[closest[1]]
+            step = first[index]
+            steps -= 1
+            col = index % cols
+            for near in (index - 1 if col > 0 else -1,
+                         index + 1 if col < cols - 1 else -1,
+                         index + cols if index < last else -1,
+                         index - cols):
+                if near < 0 or near in first:
+                    continue
+                cell = grid[near]
+                if cell == FOOD:
+                    return step
+                if cell < SNAKE_CODE:
+                    first[near] = step
+                    heappush(heap, (estimate(near) - steps, steps, near))
+        return None
+
+    """
+    Flood fills the free cells connected to the cell at index, stopping once enough have been found
+    Returns the number of cells found, at most enough, or None if the deadline passed
+    """
+    def space(self, arena, index, enough, deadline):
+        grid = arena.grid
+        cols = arena.grid_size[1]
+        last = len(grid) - cols
+        seen = set([index])
+        stack = [index]
+        n = 0
+        while stack and len(seen) < enough:
+            index = stack.pop()
+            n += 1
+            if n % CHECK_CELLS == 0 and default_timer() > deadline:
+                return None
+            col = index % cols
+            for near in (index - 1 if col > 0 else -1,
+                         index + 1 if col < cols - 1 else -1,
+                         index + cols if index < last else -1,
+                         index - cols):
+                if near >= 0 and near not in seen and grid[near] < SNAKE_CODE:
+                    seen.add(near)
+                    stack.append(near)
+        return min(len(seen), enough)
+
+    def summary(self):
+        """Returns the number of decisions, how many fell back or went over the budget, and the slowest in microseconds"""
+        return {'decisions': self.decisions, 'fallbacks': self.fallbacks, 'over_budget': self.over_budget,
+                'slowest': self.slowest * 1e6}
+
+
+class FieldBot:
+    """
+    Steers by the fields all the snakes of the arena share (see fields.py): into a region with room for the
+    snake, or else the biggest one, and then down the distance field toward the nearest food
+    The fields are brought up to date by the first snake to move each tick, so every other snake only looks at
+    the cells next to its head
+    Eating a bite re-measures the distances of the cells it was the nearest food to, which on a big board with
+    many snakes takes longer than a tick, so the game only offers boards of up to max_cells cells
+    """
+    max_cells = FIELD_BOT_CELLS
+
+    def prepare(self, arena):
+        """Builds the fields of a new game before it starts, which takes seconds on the largest boards"""
+        for_arena(arena).update()
+
+    def __call__(self, arena, snake, rng):
+        fields = for_arena(arena)
+        fields.update()
+        head = snake.body_parts[0]
+        room = len(snake.body_parts)
+        best = snake.direction
+        best_rank = None
+        for direction in safe_moves(arena, snake):
+            index = arena.cell_index(head.row + direction[0], head.col + direction[1])
+            rank = (min(fields.region_size(index), room), -fields.distance[index])
+            if best_rank is None or rank > best_rank:
+                best = direction
+                best_rank = rank
+        return best
+
+
+POLICIES = {'random': random_policy, 'greedy': greedy_policy, 'path': PathBot, 'field': FieldBot}
+
+def make_policy(name):
+    """Returns a new policy of the given name from POLICIES"""
+    policy = POLICIES[name]
+    if inspect.isclass(policy):
+        return policy()
+    return policy
@@ -0,0 +1,48 @@
+"""
+Keyboard input for the snakes.
+
+Each player has an InputQueue.  Turns pressed between two ticks are queued
+instead of overwriting each other, and the game takes at most one of them per
+tick, so two quick presses (e.g. up then left to turn around a corner) both
+happen.
+"""
+from collections import deque
+
+from engine import opposite_direction
+
+
+MAX_QUEUED_TURNS = 3
+
+class InputQueue:
+    def __init__(self, direction, max_turns=MAX_QUEUED_TURNS):
+        self.direction = direction # the direction the snake moved in at the last tick
+        self.turns = deque() # (direction, time the key was pressed)
+        self.max_turns = max_turns
+
+    """
+    Queues a turn, checked against the direction the snake will have when it is applied
+    Returns false if the turn was ignored because it changes nothing, reverses the snake, or the queue is full
+    """
+    def push(self, direction, pressed=None):
+        if self.turns:
+            last = self.turns[-1][0]
+        else:
+            last = self.direction
+        if direction == last or opposite_direction(direction, last) or len(self.turns) >= self.max_turns:
+            return False
+        self.turns.append((direction, pressed))
+        return True
+
+    """
+    Called once per tick: applies the oldest queued turn, if any
+    Returns the direction to move in and the time the applied key was pressed (None if no turn was applied)
+    """
+    def pop_turn(self):
+        if not self.turns:
+            return self.direction, None
+        self.direction, pressed = self.turns.popleft()
+        return self.direction, pressed
+
+    def clear(self, direction):
+        self.direction = direction
+        self.turns.clear()
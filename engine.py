@@ -0,0 +1,510 @@
+"""
+Game state for PySnake with no dependency on pygame.
+
+The Arena owns the grid, the snakes and the food and advances the game one
+tick at a time.  main.py renders from it and headless.py drives it without a
+display.
+
+Each Arena places food with its own random number generator, seeded with the
+seed it was given or a new one, so a game is repeated exactly by starting an
+Arena with the same seed and steering the snakes the same way (see replay.py).
+"""
+import random
+from array import array
+from collections import deque
+from itertools import compress
+
+
+DIRECTIONS = [(0,-1),(0,1),(1,0),(-1,0)] #toward (row, col)
+# Corresponds to ["West", "East", "South", "North"]
+BLUE = (0,0,255)
+RED = (255,0,0)
+GREEN = (0,255,0)
+FOOD_COLOR = BLUE
+SNAKE_COLORS = (RED, GREEN, (255,255,0), (255,0,255), (255,128,0), (160,80,255), (255,255,255), (128,128,128))
+SNAKE_NAMES = ("RED", "GREEN", "YELLOW", "PINK", "ORANGE", "PURPLE", "WHITE", "GREY")
+FOOD_POINTS = 10
+WIN_POINTS = 1000
+SNAKE_LENGTH = 10
+SEED_BITS = 64 # seeds are integers from 0 to 2**SEED_BITS - 1
+
+# Values stored in Arena.grid, one byte per cell.  Snake i is SNAKE_CODE + i.
+EMPTY = 0
+FOOD = 1
+SNAKE_CODE = 2
+MAX_SNAKES = 256 - SNAKE_CODE # snake codes have to fit in a byte of the grid
+EMPTY_MASK = bytearray([1] + [0] * 255) # grid.translate(EMPTY_MASK) has a 1 for every empty cell
+
+class Arena:
+    def __init__(self, grid_size, option, points, seed=None, food=True):
+        self.option = option
+        self.grid_size = grid_size # tuple of (row, col)
+        self.points = points
+        self.seed = new_seed() if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.grid = bytearray(grid_size[0] * grid_size[1]) # occupancy of every cell, see EMPTY/FOOD/SNAKE_CODE
+        # Grid indices of the empty cells in no particular order, and the position of each cell in that
+        # array (-1 when the cell is not empty), so cells can be taken and given back in constant time
+        self.free = array('i', xrange(len(self.grid)))
+        self.free_pos = self.free[:]
+        self.changes = None # grid indices written since the last pop_changes, None when not tracking
+        self.watchers = [] # lists from watch that the written grid indices are appended to
+        self.fields = None # fields.Fields of the arena, made by fields.for_arena when a bot first needs them
+        self.food_cells = {} # grid index -> food Body
+        self.with_food = food # false for boards that only hold snakes added with add_snake, as benchmark.py builds
+        self.spare = [] # body parts of earlier games, reused by new_body
+        self.snakes = self.initialize_snakes(SNAKE_LENGTH, option, points) # option is the number of snakes
+        self.alive = len(self.snakes)
+        self.food = []
+        if food:
+            self.initialize_food()
+
+    """
+    Starts a new game with the same snakes on the same board, keeping the grid arrays, the Snake objects and
+    their body parts instead of building new ones, so a session of many games does not keep allocating
+    The arena ends up in the same state a new Arena(grid_size, option, points, seed) starts in
+    """
+    def reset(self, points, seed=None):
+        for snake in self.snakes:
+            self.spare.extend(snake.body_parts)
+            snake.body_parts.clear()
+        self.spare.extend(self.food)
+        del self.food[:]
+        self.food_cells.clear()
+        self.changes = None
+        self.notify_all()
+        self.points = points
+        self.seed = new_seed() if seed is None else seed
+        self.rng.seed(self.seed)
+        size = len(self.grid)
+        self.grid[:] = bytearray(size)
+        self.free[:] = array('i', xrange(size))
+        self.free_pos[:] = self.free
+        count = len(self.snakes)
+        for i, snake in enumerate(self.snakes):
+            cells, direction = self.start_position(i, count, snake.length)
+            snake.reset(direction, points[i], cells)
+        self.alive = count
+        if self.with_food:
+            self.initialize_food()
+
+    def initialize_food(self):
+        food_num = (len(self.snakes)-1)*4 + 1
+        for _ in xrange(food_num):
+            self.make_food()
+
+    """
+    Up to four snakes start in the middle of a side of the board, heading in.  More snakes start in lanes
+    across the board, heading west and east in turn, each at the back of a stretch at least twice its length
+    so it has room to turn before it reaches the snake or the wall in front of it.
+    """
+    def initialize_snakes(self, length, count, points):
+        check_snake_count(count)
+        snakes = []
+        for i in xrange(count):
+            cells, direction = self.start_position(i, count, length)
+            snakes.append(Snake(self, length, snake_color(i), direction, snake_name(i), points[i], SNAKE_CODE + i, cells))
+        return snakes
+
+    def start_position(self, index, count, length):
+        """Returns the cells (None for the side of the board the direction starts from) and direction of a snake"""
+        if count <= len(DIRECTIONS):
+            return None, DIRECTIONS[index]
+        return self.spawn_cells(index, count, length)
+
+    def spawn_cells(self, index, count, length):
+        """Returns the cells, head first, and the direction of snake index out of count when they start in lanes"""
+        rows, cols = self.grid_size
+        per_lane = max(1, cols / (2 * length))
+        lanes = (count + per_lane - 1) / per_lane
+        if lanes > rows / 2 or length > cols:
+            raise ValueError("a %dx%d board has no room for %d snakes" % (rows, cols, count))
+        lane, slot = divmod(index, per_lane)
+        row = (lane + 1) * rows / (lanes + 1)
+        width = cols / per_lane
+        direction = DIRECTIONS[lane % 2]
+        if direction[1] > 0: # heading east from the left end, so the head is the rightmost cell
+            cells = [(row, slot * width + length - 1 - k) for k in xrange(length)]
+        else:
+            cells = [(row, (slot + 1) * width - length + k) for k in xrange(length)]
+        return cells, direction
+
+    def add_snake(self, cells, direction, color, name, points=0):
+        """Adds a snake covering the given empty (row, col) cells, head first, and returns it"""
+        check_snake_count(len(self.snakes) + 1)
+        snake = Snake(self, len(cells), color, direction, name, points, SNAKE_CODE + len(self.snakes), cells)
+        self.snakes.append(snake)
+        self.option = len(self.snakes)
+        self.alive += 1
+        return snake
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.grid_size[0] and 0 <= col < self.grid_size[1]
+
+    def cell_index(self, row, col):
+        return row * self.grid_size[1] + col
+
+    def cell_at(self, row, col):
+        """Returns what is in the cell: EMPTY, FOOD or the code of a snake"""
+        return self.grid[row * self.grid_size[1] + col]
+
+    def set_cell(self, index, code):
+        """Stores code in the cell at the grid index, keeping the free cell array up to date"""
+        old = self.grid[index]
+        self.grid[index] = code
+        if self.changes is not None:
+            self.changes.append(index)
+        for written in self.watchers:
+            written.append(index)
+        if old == EMPTY and code != EMPTY:
+            # swap the last free cell into the hole left by this one
+            pos = self.free_pos[index]
+            last = self.free.pop()
+            if last != index:
+                self.free[pos] = last
+                self.free_pos[last] = pos
+            self.free_pos[index] = -1
+        elif old != EMPTY and code == EMPTY:
+            self.free_pos[index] = len(self.free)
+            self.free.append(index)
+
+    def occupy(self, row, col, code):
+        self.set_cell(row * self.grid_size[1] + col, code)
+
+    def vacate(self, row, col):
+        self.set_cell(row * self.grid_size[1] + col, EMPTY)
+
+    def track_changes(self):
+        """Starts recording the grid indices that are written, for renderers that only redraw what changed"""
+        self.changes = []
+
+    def pop_changes(self):
+        """Returns the grid indices written since the last call and starts a new list"""
+        changes = self.changes
+        self.changes = []
+        return changes
+
+    """
+    Returns a list that the grid indices written from now on are appended to, and None when the whole grid is
+    rewritten, for readers other than the view (see track_changes); the reader empties it as it catches up
+    """
+    def watch(self):
+        written = []
+        self.watchers.append(written)
+        return written
+
+    def unwatch(self, written):
+        """Stops appending to a list from watch"""
+        self.watchers[:] = [other for other in self.watchers if other is not written]
+
+    def notify_all(self):
+        """Tells the watchers that the whole grid is about to be rewritten"""
+        for written in self.watchers:
+            written.append(None)
+
+    def board_full(self):
+        return len(self.free) == 0
+
+    def space_occupied(self, row, col):
+        return self.in_bounds(row, col) and self.grid[row * self.grid_size[1] + col] != EMPTY
+
+    """
+    Places food on an empty cell chosen uniformly at random
+    Returns the new food, or None if the board is full
+    """
+    def make_food(self):
+        if not self.free:
+            return None
+        index = self.free[self.rng.randrange(len(self.free))]
+        temp_row, temp_col = divmod(index, self.grid_size[1])
+        new_food = self.new_body(temp_row, temp_col, FOOD_COLOR)
+        self.food.append(new_food)
+        self.food_cells[index] = new_food
+        self.set_cell(index, FOOD)
+        return new_food
+
+    def remove_food(self, bite):
+        self.food.remove(bite)
+        index = self.cell_index(bite.row, bite.col)
+        del self.food_cells[index]
+        if self.grid[index] == FOOD:
+            self.set_cell(index, EMPTY)
+        self.spare.append(bite)
+
+    def new_body(self, row, col, color):
+        """Returns a Body for the cell, reusing a spare one if there is one"""
+        if self.spare:
+            part = self.spare.pop()
+            part.row = row
+            part.col = col
+            part.color = color
+            return part
+        return Body(row, col, color)
+
+    def move_snakes(self, directions):
+        for snake, direction in zip(self.snakes, directions):
+            if snake.alive:
+                snake.move(direction)
+
+    def tick(self, directions):
+        """
+        Advances the game by one step: moves every snake in its direction and resolves the result
+        Returns the same as detect_collisions
+        """
+        self.move_snakes(directions)
+        return self.detect_collisions()
+
+    """
+    Checks each snake to see if it has eaten food or collided with another snake or the boundary
+    Returns the Snake that loses, None if it is a tie, or False if the game continues
+    Only the cell under each head is looked at, so the cost does not depend on the length of the snakes
+    Snakes that lose are taken off the board; with more than two snakes the others play on until game_over
+    New food is made once every head has claimed its cell, so it never goes under a head that moved this tick
+    """
+
+    def detect_collisions(self):
+        losers = []
+        placed = {} # grid index -> snake whose head moved there this tick
+        eaten = 0
+        for snake in self.snakes:
+            if not snake.alive:
+                continue
+            head = snake.body_parts[0]
+            if self.check_boundary(head):
+                losers.append(snake)
+                continue
+            index = self.cell_index(head.row, head.col)
+            cell = self.grid[index]
+            if cell != EMPTY and cell != FOOD:
+                losers.append(snake)
+                other_snake = placed.get(index) # two heads moved into the same cell
+                if other_snake is not None and other_snake not in losers:
+                    losers.append(other_snake)
+                continue
+            self.set_cell(index, snake.code)
+            placed[index] = snake
+            if cell == FOOD:
+                snake.eat_food(self.food_cells[index])
+                eaten += 1
+        for _ in xrange(eaten):
+            self.make_food()
+        if not losers:
+            return False
+        for snake in losers:
+            self.remove_snake(snake)
+        if len(losers) == 1:
+            return losers[0]
+        return None
+
+    def remove_snake(self, snake):
+        """Takes a snake that lost off the board, freeing its cells"""
+        snake.alive = False
+        self.alive -= 1
+        for part in snake.body_parts:
+            if self.in_bounds(part.row, part.col) and self.cell_at(part.row, part.col) == snake.code:
+                self.vacate(part.row, part.col)
+
+    def game_over(self):
+        """A game ends when no snake is left, or only one if there were more to start with"""
+        return self.alive == 0 or (self.alive == 1 and len(self.snakes) > 1)
+
+    def winner(self):
+        """Returns the last snake left if the game is over, or None"""
+        if len(self.snakes) > 1 and self.alive == 1:
+            for snake in self.snakes:
+                if snake.alive:
+                    return snake
+        return None
+
+    """
+    Puts the free cells in index order, so where the next food goes depends only on what is on the board and
+    the random state, not on the order the cells were freed in
+    """
+    def sort_free(self):
+        self.free[:] = array('i', compress(xrange(len(self.grid)), self.grid.translate(EMPTY_MASK)))
+        free_pos = self.free_pos
+        for pos, index in enumerate(self.free):
+            free_pos[index] = pos
+
+    def get_state(self):
+        """
+        Returns the state of the game as plain values for set_state: the random state, a list of
+        (alive, direction, points, grow, cells head first) for the snakes and a list of food cells
+        """
+        snakes = [(snake.alive, snake.direction, snake.points, snake.grow, [part.get_loc() for part in snake.body_parts])
+                  for snake in self.snakes]
+        return self.rng.getstate(), snakes, [bite.get_loc() for bite in self.food]
+
+    """
+    Puts the arena in a state from get_state, with the same snakes, reusing the body parts
+    The free cells end up sorted as by sort_free, and a view drawing the arena has to draw it all again
+    """
+    def set_state(self, rng_state, snakes, food):
+        self.rng.setstate(rng_state)
+        for snake in self.snakes:
+            self.spare.extend(snake.body_parts)
+            snake.body_parts.clear()
+        self.spare.extend(self.food)
+        del self.food[:]
+        self.food_cells.clear()
+        self.notify_all()
+        size = len(self.grid)
+        self.grid[:] = bytearray(size)
+        cols = self.grid_size[1]
+        for row, col in food:
+            bite = self.new_body(row, col, FOOD_COLOR)
+            self.food.append(bite)
+            self.food_cells[row * cols + col] = bite
+            self.grid[row * cols + col] = FOOD
+        self.alive = 0
+        for snake, (alive, direction, points, grow, cells) in zip(self.snakes, snakes):
+            snake.alive = alive
+            snake.direction = direction
+            snake.points = points
+            snake.grow = grow
+            for row, col in cells:
+                snake.body_parts.append(self.new_body(row, col, snake.color))
+                if alive:
+                    self.grid[row * cols + col] = snake.code
+            if alive:
+                self.alive += 1
+        self.free_pos[:] = array('i', [-1]) * size
+        self.sort_free()
+
+    """
+    Receives a Body object representing the head of a Snake
+    Returns true if the head is out of bounds of the Arena (i.e. if the Snake has hit the wall) and false otherwise
+    """
+    def check_boundary(self, head):
+        max_rows = self.grid_size[0]
+        max_cols = self.grid_size[1]
+        return head.row < 0 or head.row >= max_rows or head.col < 0 or head.col >= max_cols
+
+
+class Body(object):
+    """One cell of a snake or a piece of food"""
+    __slots__ = ('row', 'col', 'color')
+
+    def __init__(self, row, col, color):
+        self.row = row
+        self.col = col
+        self.color = color
+
+    """
+    Receives two Body Objects
+    Returns true if the occupy the same space and are not the same object
+    """
+    def collided_with(self, other):
+        if self is other:
+            return False
+        elif self.row == other.row and self.col == other.col:
+            return True
+        return False
+
+    def get_loc(self):
+        return (self.row, self.col)
+
+class Snake:
+
+    """
+    Creates a snake of the given length at the starting position for its direction, or, if cells is given,
+    covering those (row, col) cells, head first
+    """
+    def __init__(self, arena, length, color, direction, name, points, code=SNAKE_CODE, cells=None):
+        self.arena = arena
+        self.code = code # marks the cells of this snake in arena.grid
+        self.length = length
+        self.color = color
+        self.direction = direction
+        self.points = points
+        self.name = name
+        self.grow = 0 # number of moves left that keep the tail where it is
+        self.alive = True
+        self.body_parts = deque() # head first
+        self.place(cells)
+
+    def reset(self, direction, points, cells=None):
+        """Puts the snake back at the start of a game, its old body parts having been handed to arena.spare"""
+        self.direction = direction
+        self.points = points
+        self.grow = 0
+        self.alive = True
+        self.body_parts.clear()
+        self.place(cells)
+
+    def place(self, cells):
+        """Lays the snake over the given cells, head first, or over the starting cells for its direction"""
+        if cells is None:
+            cells = self.start_cells()
+        for row, col in cells:
+            self.body_parts.append(self.arena.new_body(row, col, self.color))
+            self.arena.occupy(row, col, self.code)
+
+    def start_cells(self):
+        """Returns the cells, head first, of a snake starting from the side of the board its direction points away from"""
+        start_row = self.arena.grid_size[0] * self.direction[1] / 2
+        start_col = self.arena.grid_size[1] * self.direction[0] / 2
+        if start_row < 0:
+            start_row *= -1
+            start_col = self.arena.grid_size[1] - 1
+        elif start_col < 0:
+            start_row = self.arena.grid_size[0] - 1
+            start_col *= -1
+        cells = []
+        for j in reversed(range(self.length)):
+            cells.append((start_row + j*self.direction[0], start_col + j*self.direction[1]))
+        return cells
+
+    def eat_food(self, bite):
+        """Grows the snake and takes the bite off the board; the arena makes new food once every snake has moved"""
+        self.add_unit()
+        self.arena.remove_food(bite)
+        self.points += FOOD_POINTS
+
+    """
+    Moves the snake one cell by putting a new head in front and taking the tail off, or keeping it if the snake is growing
+    The cell the tail leaves is freed; the head cell is claimed in detect_collisions
+    """
+    def move(self, direction):
+        self.direction = direction
+        head = self.body_parts[0]
+        row = head.row + direction[0]
+        col = head.col + direction[1]
+        if self.grow > 0:
+            self.grow -= 1
+            part = self.arena.new_body(row, col, self.color)
+        else:
+            part = self.body_parts.pop() # reused as the new head
+            if self.arena.in_bounds(part.row, part.col) and self.arena.cell_at(part.row, part.col) == self.code:
+                self.arena.vacate(part.row, part.col)
+            part.row = row
+            part.col = col
+        self.body_parts.appendleft(part)
+
+    """adds body part to end of Snake, the tail stays put on the next move"""
+    def add_unit(self):
+        self.grow += 1
+
+def new_seed():
+    return random.getrandbits(SEED_BITS)
+
+def check_snake_count(count):
+    """Raises ValueError if an arena cannot hold count snakes, since each one takes a code of the byte grid"""
+    if count > MAX_SNAKES:
+        raise ValueError("an arena holds at most %d snakes, not %d" % (MAX_SNAKES, count))
+
+def snake_color(i):
+    if i < len(SNAKE_COLORS):
+        return SNAKE_COLORS[i]
+    return ((i * 97) % 206 + 50, (i * 53) % 206 + 50, (i * 151) % 206 + 50)
+
+def snake_name(i):
+    if i < len(SNAKE_NAMES):
+        return SNAKE_NAMES[i]
+    return "SNAKE %d" % (i + 1)
+
+def opposite_direction(dir1, dir2):
+    for i in xrange(len(dir1)):
+        if dir1[i] != -1*dir2[i]:
+            return False
+    return True
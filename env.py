@@ -0,0 +1,101 @@
+"""
+Reinforcement learning environments over the PySnake engine.
+
+SnakeEnv plays one engine.Arena: reset(seed) starts a game and step(actions)
+moves snake i in DIRECTIONS[actions[i]] for one tick, returning the
+observation, an array of rewards, one per snake, and whether the game is over.
+BatchEnv does the same for the games of a batch.BatchArena, starting a game
+again on the step after it ends.
+
+The observation is a NumPy view of the occupancy grid, shaped (rows, cols) with
+the cell codes of engine.py (EMPTY, FOOD and SNAKE_CODE + i for snake i).  It
+shares memory with the arena, so it shows the board after every step without
+being copied or rebuilt from the snakes; the same goes for the rewards.  Copy
+them to keep them past the next step.
+
+Rewards follow the scoring of the game: FOOD_POINTS when a snake eats, and in
+a game of more than one snake WIN_POINTS for the last one left, which is also
+added to its points as main.py does.
+
+    env = SnakeEnv((40,40), 2)
+    observation = env.reset(seed=1)
+    observation, rewards, done = env.step([1, 0])
+"""
+import numpy
+
+from engine import Arena, DIRECTIONS, SNAKE_CODE, WIN_POINTS
+from batch import BatchArena
+
+
+class SnakeEnv:
+    def __init__(self, grid_size=(40,40), option=2, seed=None):
+        self.option = option # number of snakes
+        self.arena = Arena(grid_size, option, [0] * option, seed)
+        # reset writes the grid in place, so the view stays good for every game
+        self.observation = numpy.frombuffer(self.arena.grid, dtype=numpy.uint8).reshape(grid_size)
+        self.rewards = numpy.zeros(option, dtype=numpy.int64)
+        self.directions = [snake.direction for snake in self.arena.snakes] # filled in by step
+
+    def reset(self, seed=None):
+        """Starts a new game, from a new seed unless one is given; returns the observation"""
+        self.arena.reset([0] * self.option, seed)
+        return self.observation
+
+    """
+    Moves snake i in DIRECTIONS[actions[i]] for one tick; snakes that lost are not moved
+    Returns the observation, the rewards of the snakes for this tick and whether the game is over, after which
+    reset has to be called
+    """
+    def step(self, actions):
+        arena = self.arena
+        directions = self.directions
+        rewards = self.rewards
+        for i, snake in enumerate(arena.snakes):
+            directions[i] = DIRECTIONS[actions[i]]
+            rewards[i] = -snake.points
+        arena.tick(directions)
+        for i, snake in enumerate(arena.snakes):
+            rewards[i] += snake.points
+        done = arena.game_over()
+        if done:
+            winner = arena.winner()
+            if winner is not None:
+                winner.points += WIN_POINTS
+                rewards[winner.code - SNAKE_CODE] += WIN_POINTS
+        return self.observation, rewards, done
+
+
+class BatchEnv:
+    def __init__(self, count, grid_size=(40,40), option=2, seed=None):
+        self.batch = BatchArena(count, grid_size, option, seed=seed)
+        self.observation = self.batch.grid.reshape(count, grid_size[0], grid_size[1]) # a view, [arena, row, col]
+        self.rewards = numpy.zeros((count, option), dtype=numpy.int64)
+        self.done = numpy.zeros(count, dtype=bool)
+
+    def reset(self, seed=None):
+        """Starts a new game in every arena, restarting the generator of the batch if a seed is given"""
+        self.batch.reset(seed=seed)
+        self.done[:] = False
+        return self.observation
+
+    """
+    Starts the games that ended on the last step again, then moves snake p of arena b in
+    DIRECTIONS[actions[b, p]] for one tick
+    Returns the observation, the rewards indexed [arena, snake] and which games ended on this step
+    """
+    def step(self, actions):
+        batch = self.batch
+        finished = numpy.flatnonzero(self.done)
+        if len(finished):
+            batch.reset(finished)
+        rewards = self.rewards
+        numpy.negative(batch.points, out=rewards)
+        batch.step(actions)
+        rewards += batch.points
+        self.done[:] = batch.game_over()
+        if batch.option > 1:
+            winner = batch.winner()
+            won = numpy.flatnonzero(winner >= 0)
+            batch.points[won, winner[won]] += WIN_POINTS
+            rewards[won, winner[won]] += WIN_POINTS
+        return self.observation, rewards, self.done
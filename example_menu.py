@@ -46,18 +46,71 @@ import sys, pygame
 from menu import *
 
 
+## Ticks per second for each difficulty
+SPEEDS = {'Easy': 7, 'Normal': 10, 'Hard': 15}
+
+## Board sizes in (rows, columns), boards bigger than the screen are drawn
+#  with smaller cells (render.GridView) or, past that, scroll
+BOARDS = [('Small',      (30, 30)),
+          ('Medium',     (40, 40)),
+          ('Large',      (100, 100)),
+          ('Very Large', (200, 200)),
+          ('Huge',       (1000, 1000))]
+
+
 ## ---[ main ]------------------------------------------------------------------
-#  This function runs the entire screen and contains the main while loop
+#  Shows the main menu and returns 1 for single player, 2 for multiplayer, 3
+#  for a game against a computer snake or 4 for a free for all against computer
+#  snakes.  See run_menu for shown
 #
-def main(screen):
+def main(screen, shown=None):
+   return run_menu(screen,
+                   [('Single Player',   1, None),
+                    ('Multiplayer',     2, None),
+                    ('Versus Computer', 3, None),
+                    ('Free For All',    4, None),
+                    ('Exit',            5, None),], 5, shown)
+
+
+## ---[ speed ]-----------------------------------------------------------------
+#  Shows the difficulty menu and returns the number of ticks per second the
+#  snakes move at
+#
+def speed(screen):
+   return run_menu(screen,
+                   [('Easy',   SPEEDS['Easy'],   None),
+                    ('Normal', SPEEDS['Normal'], None),
+                    ('Hard',   SPEEDS['Hard'],   None),], None)
+
+
+## ---[ board ]-----------------------------------------------------------------
+#  Shows the board size menu for the given (name, (rows, columns)) boards, all
+#  of BOARDS by default, and returns the (rows, columns) of the board picked
+#
+def board(screen, boards=BOARDS):
+   state = run_menu(screen,
+                    [(name, i + 1, None) for i, (name, size) in enumerate(boards)],
+                    None)
+   return boards[state - 1][1]
+
+
+## ---[ run_menu ]--------------------------------------------------------------
+#  This function runs the entire screen and contains the main while loop.  It
+#  returns the state of the button that was pressed, or exits the program if
+#  it was the exit_state button.  shown, if given, is called once the menu is
+#  first on the screen
+#
+def run_menu(screen, buttons, exit_state, shown=None):
+
+   # Start from a blank screen, in case another menu was shown before (the
+   # menu keeps a copy of the screen as its background)
+   screen.fill(BLACK)
+   pygame.display.flip()
 
    # Create 3 diffrent menus.  One of them is only text, another one is only
    # images, and a third is -gasp- a mix of images and text buttons!  To
    # understand the input factors, see the menu file
-   menu = cMenu(50, 50, 20, 5, 'vertical', 100, screen,
-               [('Single Player', 1, None),
-                ('Multiplayer',  2, None),
-                ('Exit',         4, None),])
+   menu = cMenu(50, 50, 20, 5, 'vertical', 100, screen, buttons)
 
    # Center the menu on the draw_surface (the entire screen here)
    menu.set_center(True, True)
@@ -96,18 +149,12 @@ def main(screen):
       if e.type == pygame.KEYDOWN or e.type == EVENT_CHANGE_STATE:
          if state == 0:
             rect_list, state = menu.update(e, state)
-         elif state == 1:
-            print 'Single Player'
-            state = 0
-            return 1
-         elif state == 2:
-            print 'Multi-Player'
-            state = 0
-            return 2
-         else:
+         elif state == exit_state:
             print 'Exit!'
             pygame.quit()
             sys.exit()
+         else:
+            return state
 
       # Quit if the user presses the exit button
       if e.type == pygame.QUIT:
@@ -116,3 +163,6 @@ def main(screen):
 
       # Update the screen
       pygame.display.update(rect_list)
+      if shown is not None and rect_list:
+         shown()
+         shown = None
@@ -0,0 +1,417 @@
+"""
+Distance to food and free regions of an arena, shared by its computer snakes.
+
+Fields keeps two things for every cell of the grid.  One is the number of
+steps to the nearest food, going around snakes.  The other is the label of the
+region of connected free cells the cell belongs to; the size of each region is
+kept too.  Snake cells are at UNREACHABLE and have no region.
+
+update() catches up with the cells the arena wrote since the last call, which
+it learns from Arena.watch.  Only the area around those cells is searched.  A
+cell a snake moves into raises the distances that were measured through it,
+so those cells are found and measured again from their neighbours.  A freed
+cell or new food lowers the distances around it.  A freed cell joins the
+regions next to it.  A cell taken from a region splits it only if its free
+neighbours are not joined around it; then they are searched from all at once
+until all but one have met or run out.  Every snake can call update(), since
+it does nothing once caught up, so how much searching is done each tick does
+not grow with the number of snakes that read the fields.
+
+for_arena(arena) returns the Fields of an arena, made the first time.
+"""
+from collections import deque
+
+from engine import FOOD, SNAKE_CODE
+
+
+UNREACHABLE = 1 << 30 # distance of snake cells and of cells no food can be reached from
+NO_REGION = -1
+
+def for_arena(arena):
+    """Returns the Fields shared by everything that steers snakes in the arena, kept on the arena"""
+    if arena.fields is None:
+        arena.fields = Fields(arena)
+    return arena.fields
+
+
+class Buckets:
+    """
+    Cells to visit in order of distance, for searches that only add cells at the distance being visited or
+    further; cheaper than a heap since distances are small whole numbers
+    """
+    def __init__(self):
+        self.cells = {} # distance -> list of cells
+        self.lowest = None
+
+    def add(self, step, index):
+        cells = self.cells.get(step)
+        if cells is None:
+            cells = self.cells[step] = []
+            if self.lowest is None or step < self.lowest:
+                self.lowest = step
+        cells.append(index)
+
+    def __iter__(self):
+        """Yields (distance, cell) nearest first, including cells added along the way"""
+        while self.cells:
+            step = self.lowest
+            cells = self.cells.get(step)
+            if cells is not None:
+                for index in cells: # may grow while it is being read
+                    yield step, index
+                del self.cells[step]
+            self.lowest = step + 1
+
+
+class Fields:
+    def __init__(self, arena):
+        self.arena = arena
+        self.written = arena.watch()
+        self.rebuild()
+
+    def rebuild(self):
+        """Measures both fields over the whole grid"""
+        arena = self.arena
+        grid = arena.grid
+        size = len(grid)
+        del self.written[:]
+        self.seen = bytearray(grid) # the grid as the fields last saw it
+        self.pending = set() # snake cells still counted in their regions while update_regions runs
+        self.distance = [UNREACHABLE] * size
+        queue = deque()
+        for index in arena.food_cells:
+            self.distance[index] = 0
+            queue.append(index)
+        self.spread(queue)
+        self.label_all()
+
+    def label_all(self):
+        """Labels every region, written out like spread since it visits every cell"""
+        grid = self.arena.grid
+        cols = self.arena.grid_size[1]
+        last = len(grid) - cols
+        region = self.region = [NO_REGION] * len(grid)
+        self.sizes = {} # region label -> number of cells
+        self.next_label = 0
+        for start in xrange(len(grid)):
+            if region[start] != NO_REGION or grid[start] >= SNAKE_CODE:
+                continue
+            label = self.new_label()
+            region[start] = label
+            stack = [start]
+            count = 0
+            while stack:
+                index = stack.pop()
+                count += 1
+                col = index % cols
+                for near in (index - 1 if col else -1, index + 1 if col < cols - 1 else -1,
+                             index + cols if index < last else -1, index - cols):
+                    if near >= 0 and region[near] == NO_REGION and grid[near] < SNAKE_CODE:
+                        region[near] = label
+                        stack.append(near)
+            self.sizes[label] = count
+
+    def update(self):
+        """Brings the fields up to date with the grid"""
+        written = self.written
+        if not written:
+            return
+        if None in written:
+            self.rebuild()
+            return
+        grid = self.arena.grid
+        seen = self.seen
+        blocked = [] # free cells a snake moved into
+        freed = [] # snake cells that became free, and free cells that got food
+        unfed = [] # food cells that became empty
+        for index in set(written):
+            old = seen[index]
+            new = grid[index]
+            if old == new:
+                continue
+            seen[index] = new
+            if new >= SNAKE_CODE:
+                if old < SNAKE_CODE:
+                    blocked.append(index)
+            elif old >= SNAKE_CODE or new == FOOD:
+                freed.append(index)
+            else:
+                unfed.append(index)
+        del written[:]
+        self.update_distance(blocked, freed, unfed)
+        self.update_regions(blocked, [index for index in freed if self.region[index] == NO_REGION])
+
+    def neighbours(self, index):
+        """Returns the grid indices of the cells next to the cell at index"""
+        cols = self.arena.grid_size[1]
+        cells = []
+        if index % cols:
+            cells.append(index - 1)
+        if (index + 1) % cols:
+            cells.append(index + 1)
+        if index + cols < len(self.seen):
+            cells.append(index + cols)
+        if index >= cols:
+            cells.append(index - cols)
+        return cells
+
+    def open_neighbours(self, index):
+        """Returns the cells next to the cell at index that no snake is on"""
+        grid = self.arena.grid
+        cols = self.arena.grid_size[1]
+        cells = []
+        if index % cols and grid[index - 1] < SNAKE_CODE:
+            cells.append(index - 1)
+        if (index + 1) % cols and grid[index + 1] < SNAKE_CODE:
+            cells.append(index + 1)
+        if index + cols < len(grid) and grid[index + cols] < SNAKE_CODE:
+            cells.append(index + cols)
+        if index >= cols and grid[index - cols] < SNAKE_CODE:
+            cells.append(index - cols)
+        return cells
+
+    def free_neighbours(self, index):
+        """Returns the free cells next to the cell at index, counting the cells in pending as free"""
+        cells = self.open_neighbours(index)
+        if self.pending:
+            pending = self.pending
+            cells.extend(near for near in self.neighbours(index) if near in pending)
+        return cells
+
+    def spread(self, queue):
+        """Breadth first from the cells in the queue, whose distances are right, lowering the distances past them"""
+        grid = self.arena.grid
+        distance = self.distance
+        cols = self.arena.grid_size[1]
+        last = len(grid) - cols # first index of the bottom row
+        while queue:
+            index = queue.popleft()
+            step = distance[index] + 1
+            col = index % cols
+            for near in (index - 1 if col else -1, index + 1 if col < cols - 1 else -1,
+                         index + cols if index < last else -1, index - cols):
+                if near >= 0 and step < distance[near] and grid[near] < SNAKE_CODE:
+                    distance[near] = step
+                    queue.append(near)
+
+    """
+    Raises the distances that were measured through blocked cells or food that is gone, then lowers the ones
+    that can now go through freed cells or new food
+    The neighbours of a cell are worked out in the loops themselves, which run for every cell whose distance
+    changes
+    """
+    def update_distance(self, blocked, freed, unfed):
+        grid = self.arena.grid
+        distance = self.distance
+        cols = self.arena.grid_size[1]
+        last = len(grid) - cols
+        # cells whose distance may have to go up, checked nearest first, so the cells that could still
+        # support a cell are settled before it
+        check = Buckets()
+        for index in blocked:
+            old = distance[index]
+            distance[index] = UNREACHABLE
+            for near in self.open_neighbours(index):
+                if distance[near] == old + 1:
+                    check.add(old + 1, near)
+        for index in unfed:
+            check.add(0, index)
+        lost = set()
+        for step, index in check:
+            if index in lost or grid[index] == FOOD:
+                continue
+            col = index % cols
+            nears = (index - 1 if col else -1, index + 1 if col < cols - 1 else -1,
+                     index + cols if index < last else -1, index - cols)
+            supported = False
+            for near in nears:
+                if near >= 0 and distance[near] == step - 1 and near not in lost:
+                    supported = True
+                    break
+            if supported:
+                continue
+            lost.add(index)
+            for near in nears:
+                if near >= 0 and distance[near] == step + 1 and near not in lost:
+                    check.add(step + 1, near)
+
+        # measure the lost cells again from their neighbours, and the freed cells, then spread lower distances
+        for index in lost:
+            distance[index] = UNREACHABLE
+        spread = Buckets()
+        for index in list(lost) + freed:
+            if grid[index] == FOOD:
+                step = 0
+            else:
+                col = index % cols
+                step = min(distance[index - 1] if col else UNREACHABLE,
+                           distance[index + 1] if col < cols - 1 else UNREACHABLE,
+                           distance[index + cols] if index < last else UNREACHABLE,
+                           distance[index - cols] if index >= cols else UNREACHABLE) + 1
+            if step < UNREACHABLE:
+                distance[index] = step
+                spread.add(step, index)
+        for step, index in spread:
+            if step != distance[index]:
+                continue
+            step += 1
+            col = index % cols
+            for near in (index - 1 if col else -1, index + 1 if col < cols - 1 else -1,
+                         index + cols if index < last else -1, index - cols):
+                if near >= 0 and step < distance[near] and grid[near] < SNAKE_CODE:
+                    distance[near] = step
+                    spread.add(step, near)
+
+    """
+    Joins the freed cells to the regions around them, then takes the blocked cells out one at a time, the ones
+    still to come counting as free, so each split is found from the cells next to the cell that made it
+    """
+    def update_regions(self, blocked, freed):
+        region = self.region
+        sizes = self.sizes
+        self.pending.update(blocked)
+        for index in freed:
+            self.join(index)
+        for index in blocked:
+            self.pending.discard(index)
+            sizes[region[index]] -= 1
+            region[index] = NO_REGION
+            by_region = {}
+            for near in self.free_neighbours(index):
+                by_region.setdefault(region[near], []).append(near)
+            for label, cells in by_region.iteritems():
+                if len(cells) > 1:
+                    self.split(index, label, cells)
+        for label in [label for label, size in sizes.iteritems() if size <= 0]:
+            del sizes[label]
+
+    def join(self, index):
+        """Adds a freed cell to the regions next to it, relabelling all but the biggest of them into it"""
+        region = self.region
+        sizes = self.sizes
+        if region[index] != NO_REGION: # taken in by the relabelling of an earlier freed cell
+            return
+        labels = set(region[near] for near in self.free_neighbours(index) if region[near] != NO_REGION)
+        if not labels:
+            label = self.new_label()
+            region[index] = label
+            sizes[label] = 1
+            return
+        label = max(labels, key=lambda label: sizes[label])
+        region[index] = label
+        sizes[label] += 1
+        for near in self.free_neighbours(index):
+            if region[near] != label:
+                sizes[label] += self.relabel(near, label)
+
+    """
+    Gives the free cells connected to start the label, taking them off the sizes of the regions they were in
+    Returns how many cells were relabelled
+    """
+    def relabel(self, start, label):
+        region = self.region
+        sizes = self.sizes
+        stack = [start]
+        count = 0
+        while stack:
+            index = stack.pop()
+            if region[index] == label:
+                continue
+            if region[index] != NO_REGION:
+                sizes[region[index]] -= 1
+            region[index] = label
+            count += 1
+            for near in self.free_neighbours(index):
+                if region[near] != label:
+                    stack.append(near)
+        return count
+
+    """
+    Called when the cell at index was taken from the region with the label and the cells, next to it, are left in
+    that region; gives new labels to the parts they are no longer connected through
+    """
+    def split(self, index, label, cells):
+        seeds = self.joined_around(index, cells)
+        if len(seeds) < 2:
+            return
+        owner = {} # cell -> search that reached it first
+        merged = range(len(seeds)) # search -> search it was merged into
+        queues = []
+        found = []
+        for i, seed in enumerate(seeds):
+            owner[seed] = i
+            queues.append(deque([seed]))
+            found.append([seed])
+        def find(i):
+            while merged[i] != i:
+                i = merged[i]
+            return i
+        searching = set(xrange(len(seeds)))
+        while len(searching) > 1:
+            for i in list(searching):
+                if i not in searching:
+                    continue
+                queue = queues[i]
+                if not queue: # all of this part was found without meeting another search
+                    searching.discard(i)
+                    part = self.new_label()
+                    for cell in found[i]:
+                        self.region[cell] = part
+                    self.sizes[part] = len(found[i])
+                    self.sizes[label] -= len(found[i])
+                    if len(searching) == 1:
+                        break
+                    continue
+                cell = queue.popleft()
+                for near in self.free_neighbours(cell):
+                    j = owner.get(near)
+                    if j is None:
+                        owner[near] = i
+                        queue.append(near)
+                        found[i].append(near)
+                        continue
+                    j = find(j)
+                    if j != i: # the searches met, so their cells are still connected
+                        merged[j] = i
+                        queue.extend(queues[j])
+                        found[i].extend(found[j])
+                        searching.discard(j)
+
+    def joined_around(self, index, cells):
+        """Returns one of the cells from each group of them that is joined through the free cells around index"""
+        rows, cols = self.arena.grid_size
+        grid = self.arena.grid
+        row, col = divmod(index, cols)
+        # the eight cells around, each next to the one before, with the cells next to index at even positions
+        around = [(row - 1, col), (row - 1, col + 1), (row, col + 1), (row + 1, col + 1),
+                  (row + 1, col), (row + 1, col - 1), (row, col - 1), (row - 1, col - 1)]
+        pending = self.pending
+        free = [0 <= r < rows and 0 <= c < cols and (grid[r * cols + c] < SNAKE_CODE or r * cols + c in pending)
+                for r, c in around]
+        if all(free):
+            return cells[:1]
+        start = free.index(False)
+        seeds = []
+        run = None # first of the cells given in the current run of free cells
+        for k in xrange(start + 1, start + 9):
+            r, c = around[k % 8]
+            if not free[k % 8]:
+                run = None
+                continue
+            near = r * cols + c
+            if run is None and near in cells:
+                run = near
+                seeds.append(near)
+        return seeds
+
+    def new_label(self):
+        label = self.next_label
+        self.next_label += 1
+        return label
+
+    def region_size(self, index):
+        """Returns the number of free cells in the region of the cell at index, 0 for a snake cell"""
+        label = self.region[index]
+        if label == NO_REGION:
+            return 0
+        return self.sizes[label]
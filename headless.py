@@ -0,0 +1,56 @@
+"""
+Runs PySnake games without a display.
+
+Games are stepped through engine.Arena as fast as possible, the arena is
+reset for a new game as soon as one ends, and the throughput is reported at
+the end.
+
+    python headless.py --ticks 100000 --players 2
+    python headless.py --policy path
+"""
+import argparse
+import random
+import time
+
+from engine import Arena
+from bots import POLICIES, random_policy, make_policy
+
+
+def run(ticks, option=2, grid_size=(40,40), policy=random_policy, seed=None):
+    """
+    Steps games for the given number of ticks, resetting the Arena whenever a game ends
+    Returns a dictionary with the number of ticks and games played and the ticks per second
+    """
+    rng = random.Random(seed)
+    if seed is not None:
+        random.seed(seed)
+    arena = Arena(grid_size, option, [0]*option)
+    games = 1
+    start = time.time()
+    for _ in xrange(ticks):
+        directions = [policy(arena, snake, rng) for snake in arena.snakes]
+        arena.tick(directions)
+        if arena.game_over():
+            arena.reset([0]*option)
+            games += 1
+    seconds = time.time() - start
+    return {'ticks': ticks,
+            'games': games,
+            'seconds': seconds,
+            'ticks_per_sec': ticks / seconds if seconds > 0 else float('inf')}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run PySnake games without a display")
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=40)
+    parser.add_argument('--cols', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random', help="how the snakes are steered")
+    args = parser.parse_args()
+
+    stats = run(args.ticks, args.players, (args.rows, args.cols), make_policy(args.policy), args.seed)
+    print "%d ticks, %d games in %.2fs (%.0f ticks/sec)" % (stats['ticks'], stats['games'], stats['seconds'], stats['ticks_per_sec'])
+
+if __name__ == '__main__':
+    main()
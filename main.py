@@ -1,320 +1,250 @@
+from timeit import default_timer
+STARTED = default_timer() # the imports below count towards the startup time
+
 import pygame
 import os
 import random
-from example_menu import main as menu
+from example_menu import main as menu, speed, board, BOARDS
+from engine import Arena, DIRECTIONS, BLUE, WIN_POINTS
+from bots import POLICIES, make_policy
+from render import make_view, scrolls
+from assets import render_text, get_font, preload_font
+from timing import FixedStepClock, LatencyMeter, StageTimer
+from controls import InputQueue
+from profiler import ProfilerOverlay, from_environment
+from transitions import countdown
+from replay import Recorder, replay_path, from_environment as replay_directory
 
 
-WIDTH = 10
-HEIGHT = 10
-DIRECTIONS = [(0,-1),(0,1),(1,0),(-1,0)] #toward (row, col)
-# Corresponds to ["East", "West", "South", "North"]
 DIR_KEYS_1 = [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_UP]
 DIR_KEYS_2 = [pygame.K_a, pygame.K_d, pygame.K_s, pygame.K_w]
-BLUE = (0,0,255)
-RED = (255,0,0)
-GREEN = (0,255,0)
-FOOD_COLOR = BLUE
-SNAKE_COLORS = (RED, GREEN)
-SNAKE_NAMES = ("RED", "GREEN")
-
-class Arena:
-    # To be full screen and should have a border
-    def __init__(self, x, y, border_width, grid_size, option, points):
-        self.x = x
-        self.y = y
-        self.option = option
-        self.border_width = border_width
-        self.grid_size = grid_size # tuple of (row, col)
-        self.points = points
-        self.snakes = self.initialize_snakes(10, SNAKE_COLORS[:option], SNAKE_NAMES, points) # option is single or multiplayer from the menu
-        self.food = []
-        self.components = pygame.sprite.RenderPlain()
-        self.initialize_food()
-        for snake in self.snakes:
-            for parts in snake.body_parts:
-                self.components.add(parts)
-
-    def initialize_food(self):
-        food_num = (len(self.snakes)-1)*4 + 1
-        for _ in xrange(food_num):
-            self.make_food()
-
-    def initialize_snakes(self, length, colors, names, points):
-        snakes = []
-        for i in xrange(len(colors)):
-            s = Snake(self, length, colors[i], DIRECTIONS[i], names[i], points[i])
-            snakes.append(s)
-        return snakes
-
-    def space_occupied(self, row, col):
-        for sprite in self.components.sprites():
-            if sprite.row == row and sprite.col == col:
-                return True
-        return False
-
-    def make_food(self):
-        temp_row = random.randrange(self.grid_size[0])
-        temp_col = random.randrange(self.grid_size[1])
-        while self.space_occupied(temp_row, temp_col):
-            temp_row = random.randrange(self.grid_size[0])
-            temp_col = random.randrange(self.grid_size[1])
-        new_food = Body(self, temp_row, temp_col, FOOD_COLOR)
-        self.food.append(new_food)
-        self.components.add(new_food)
-
-    def remove_food(self, bite):
-        self.components.remove(bite)
-        self.food.remove(bite)
-
-    def move_snakes(self, directions):
-        for snake, direction in zip(self.snakes, directions):
-            snake.move(direction)
-
-    """
-    Checks each snake to see if it has eaten food or collided with another snake or the boundary
-    Returns the Snake that loses, None if it is a tie, or False if the game continues
-    """
-
-    def detect_collisions(self):
-        loser = False
-        for snake in self.snakes:
-            head = snake.body_parts[0]
-            for bite in self.food:
-                if head.collided_with(bite):
-                    snake.eat_food(bite)
-            if self.check_boundary(head):
-                if loser is False:
-                    loser = snake
-                else:
-                    loser = None
-            for other_snake in self.snakes: # named other_snake so it is not confused with the snake variable already created
-                for body in other_snake.body_parts:
-                    if head.collided_with(body):
-                        if loser is False:
-                            loser = snake
-                        else:
-                            loser = None
-        return loser
-
-    """
-    Receives a Body object representing the head of a Snake
-    Returns true if the head is out of bounds of the Arena (i.e. if the Snake has hit the wall) and false otherwise
-    """
-    def check_boundary(self, head):
-        max_rows = self.grid_size[0]
-        max_cols = self.grid_size[1]
-        return head.row < 0 or head.row > max_rows or head.col < 0 or head.col > max_cols
-
-    def get_col_left_loc(self, col, width=WIDTH):
-        return self.x + col * width
-
-    def get_row_top_loc(self, row, height=HEIGHT):
-        return self.y + row * height
-
-    def draw_border(self, screen, color):
-        width = self.grid_size[0] * WIDTH + 1.5*self.border_width
-        height = self.grid_size[1] * HEIGHT + 1.5*self.border_width
-        rect = pygame.Rect(self.x-self.border_width/2, self.y-self.border_width/2, width, height)
-        pygame.draw.rect(screen, color, rect, self.border_width)
-
-
-class Body(pygame.sprite.Sprite):
-    def __init__(self,arena, row, col, color):
-        pygame.sprite.Sprite.__init__(self)
-        self.row = row
-        self.col = col
-        self.arena = arena
-        self.image = pygame.Surface([WIDTH, HEIGHT])
-        self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.x = self.arena.get_col_left_loc(col)
-        self.rect.y = self.arena.get_row_top_loc(row)
-        self.color = color
-
-    """
-    Receives two Body Objects
-    Returns true if the occupy the same space and are not the same object
-    """
-    def collided_with(self, other):
-        if self == other:
-            return False
-        elif self.row == other.row and self.col == other.col:
-            return True
-        return False
-
-    def get_loc(self):
-        return (self.row, self.col)
-
-    def update(self):
-        self.rect.x = self.arena.get_col_left_loc(self.col)
-        self.rect.y = self.arena.get_row_top_loc(self.row)
-
-class Snake:
-
-    def __init__(self, arena, length, color, direction, name, points):
-        self.arena = arena
-        self.length = length
-        self.color = color
-        self.direction = direction
-        self.points = points
-        self.name = name
-
-        # Create body parts depending on initial direction
-        start_row = self.arena.grid_size[0] * self.direction[1] / 2
-        start_col = self.arena.grid_size[1] * self.direction[0] / 2
-        if start_row < 0:
-            start_row *= -1
-            start_col = self.arena.grid_size[1] - 1
-        elif start_col < 0:
-            start_row = self.arena.grid_size[0] - 1
-            start_col *= -1
-        parts = []
-        for j in reversed(range(self.length)):
-            row_n = start_row + j*self.direction[0]
-            col_n = start_col + j*self.direction[1]
-            b = Body(self.arena, row_n, col_n, self.color)
-            parts.append(b)
-        self.body_parts = parts
-
-    def eat_food(self, bite):
-        self.add_unit()
-        self.arena.remove_food(bite)
-        self.arena.make_food()
-        self.points += 10
-
-    def move(self, direction):
-        self.direction = direction
-        for i in reversed(range(len(self.body_parts))):
-            part = self.body_parts[i]
-            if i == 0:
-                part.row += self.direction[0]
-                part.col += self.direction[1]
-            else:
-                previous = self.body_parts[i-1]
-                part.row = previous.row
-                part.col = previous.col
-            part.update()
-
-    """adds body part to end of Snake"""
-    def add_unit(self):
-        previous = self.body_parts[-1]
-        unit = Body(self.arena, previous.row, previous.col, self.color)
-        self.body_parts.append(unit)
-        self.arena.components.add(unit)
-
-def opposite_direction(dir1, dir2):
-    for i in xrange(len(dir1)):
-        if dir1[i] != -1*dir2[i]:
-            return False
-    return True
-
-def fade_out_message(screen, clock, color, message):
-    text_size = 200
-    font = pygame.font.SysFont('Couriernew', text_size)
-    text = font.render(message, True, color, (0,0,0))
-    text_rect = text.get_rect()
-    text_rect.centerx = screen.get_width()/2
-    text_rect.centery = screen.get_height()/2
-
-    for i in range(255):
-        screen.fill((0,0,0))
-        text.set_alpha(i)
-        screen.blit(text, text_rect)
-        pygame.display.flip()
-        clock.tick(250)
+PLAYER_KEYS = [DIR_KEYS_1, DIR_KEYS_2] # direction keys of human player 1, 2
+RENDER_FPS = 60 # frames per second drawn, independent of the ticks per second of the game
+PROFILER_KEY = pygame.K_F3
+SCORE_MARGIN = 250 # room left of and right of the arena for the scores, more if the font needs it
+SCORE_FONT_SIZE = 50
+SCORE_SAMPLE = "PURPLE: 99999" # as wide as the scores get, for the room kept beside the arena
+EDGE_MARGIN = 40 # room above and below the arena
+BORDER_WIDTH = 20
+FREE_FOR_ALL_SNAKES = 8
+# main menu state -> (snakes, human players, policy of the computer snakes from bots.POLICIES)
+GAME_MODES = {1: (1, 1, None), 2: (2, 2, None), 3: (2, 1, 'path'), 4: (FREE_FOR_ALL_SNAKES, 1, 'field')}
+SCORE_SNAKES = 4 # most snakes listed on the game over menu
+MENU_FONT_SIZE = 25 # what menu.cMenu uses, loaded before the menu so it is timed on its own
 
 class Game():
-    def __init__(self):
+    def __init__(self, startup=None):
         """
         Set up the components to start a game
+        startup is a StageTimer for the time until the first menu is shown, reported once it is
         """
-        size = (40,40)
-        pygame.init()
+        if startup is None:
+            startup = StageTimer()
+        startup.mark('imports')
+        preload_font() # the font lookup can scan the system fonts, let it run while the display is set up
+        # only the modules the game uses, not sound or joysticks
+        pygame.display.init()
+        pygame.font.init()
         width = pygame.display.Info().current_w
         height = pygame.display.Info().current_h
         screen = pygame.display.set_mode((width, height), pygame.FULLSCREEN, 32)
-
-        game_choice = menu(screen)
+        clock = pygame.time.Clock()
+        clock.tick() # starts SDL's timer, which pygame.time.get_ticks needs
+        startup.mark('display')
+        get_font(MENU_FONT_SIZE)
+        startup.mark('font')
+
+        def shown():
+            startup.mark('menu')
+            print startup.report('Startup')
+        snakes, self.humans, self.bot_policy = GAME_MODES[menu(screen, shown)]
+        self.tick_rate = speed(screen)
+        size = board(screen, self.board_choices(screen))
         pygame.display.set_caption("PySnake")
-        arena = Arena(screen.get_rect().centerx-size[0]*WIDTH/2, screen.get_rect().centery-size[1]*HEIGHT/2, 20, size, game_choice, (0,0))
+        arena = Arena(size, snakes, [0]*snakes)
+        view = make_view(arena, self.arena_area(screen), BORDER_WIDTH)
 
-        clock = pygame.time.Clock()
-        self.main_loop(screen, arena, clock)
+        self.profiler, self.profile_path = from_environment()
+        self.overlay = ProfilerOverlay(self.profiler)
+        self.replay_dir = replay_directory() # where to save a replay of each game, if anywhere
+
+        self.run_session(screen, view, clock)
+        if self.profiler.phases:
+            self.profiler.dump(self.profile_path)
         pygame.quit()
 
-    def update_text(self, screen, arena):
+    def run_session(self, screen, view, clock):
+        """
+        Plays games until the player quits, one after another rather than each from inside the last
+        The arena, its snakes and the view are reset in place for every rematch instead of being built again
+        """
+        points = self.main_loop(screen, view, clock)
+        while points is not None:
+            view.arena.reset(points)
+            points = self.main_loop(screen, view, clock)
+
+    def board_choices(self, screen):
+        """Returns the boards of the menu the game mode can be played on"""
+        area = self.arena_area(screen)
+        max_cells = getattr(POLICIES.get(self.bot_policy), 'max_cells', None) # computer snakes too slow for big boards
+        choices = []
+        for name, size in BOARDS:
+            if self.humans > 1 and scrolls(size, area):
+                continue # the window of a scrolling board follows only the first snake
+            if max_cells is not None and size[0] * size[1] > max_cells:
+                continue
+            choices.append((name, size))
+        return choices
+
+    def arena_area(self, screen):
+        """Returns the part of the screen the arena can take up, leaving room for the scores and the border"""
+        margin = max(SCORE_MARGIN, get_font(SCORE_FONT_SIZE).size(SCORE_SAMPLE)[0] + BORDER_WIDTH)
+        return screen.get_rect().inflate(-2*margin, -2*EDGE_MARGIN)
+
+    def update_text(self, screen, view):
+        """
+        Draws the scores if any of them changed since the last call
+        Returns the list of rects that were drawn on
+        """
+        arena = view.arena
         self.screen = screen
         self.arena = arena
-        font = pygame.font.SysFont('Couriernew', 50)
+        points = [snake.points for snake in arena.snakes]
+        if points == self.shown_points:
+            return []
+        self.shown_points = points
         texts = []
         if len(arena.snakes) == 1:
-            texts.append(font.render("POINTS: "+str(arena.snakes[0].points), True, arena.snakes[0].color))
+            texts.append(render_text("POINTS: "+str(arena.snakes[0].points), SCORE_FONT_SIZE, arena.snakes[0].color))
         else:
-            texts.append(font.render("GREEN: "+str(arena.snakes[1].points), True, arena.snakes[1].color))
-            texts.append(font.render("RED: "+str(arena.snakes[0].points), True, arena.snakes[0].color))
-
-        textX = [screen.get_rect().centerx - arena.grid_size[0]*WIDTH, screen.get_rect().centerx + arena.grid_size[0]*HEIGHT]
-
+            # the first snake on the right, and the one leading the others on the left
+            first = arena.snakes[0]
+            leader = max(arena.snakes[1:], key=lambda snake: snake.points)
+            texts.append(render_text(leader.name+": "+str(leader.points), SCORE_FONT_SIZE, leader.color))
+            texts.append(render_text(first.name+": "+str(first.points), SCORE_FONT_SIZE, first.color))
+
+        field = view.get_screen_rect()
+        offset = min(field.width/2, (screen.get_width() - field.width)/4) # halfway to the edge of the screen at most
+        textX = [field.left - offset, field.right + offset]
+
+        rects = []
+        for old in self.text_rects:
+            view.restore(screen, old)
+            rects.append(old)
+        self.text_rects = []
         for i in range(len(texts)):
             textpos = texts[i].get_rect()
             textpos.centery = screen.get_rect().centery
             textpos.centerx = textX[i]
+            # kept off the border and the cells, however little room the arena leaves beside it
+            if i == 0:
+                textpos.right = min(textpos.right, field.left - view.border_width)
+            else:
+                textpos.left = max(textpos.left, field.right + view.border_width)
             self.screen.blit(texts[i], textpos)
-        pygame.display.flip()
+            self.text_rects.append(textpos)
+            rects.append(textpos)
+        return rects
 
-    def main_loop(self, screen, arena, clock):
-        directions = [DIRECTIONS[0], DIRECTIONS[1]]
+    """
+    Plays one game on the view's arena and shows the game over menu
+    Returns the points to start the next game with if the player wants a rematch, or None to quit
+    """
+    def main_loop(self, screen, view, clock):
+        arena = view.arena
+        humans = arena.snakes[:self.humans]
+        bots = arena.snakes[self.humans:]
+        inputs = [InputQueue(snake.direction) for snake in humans]
+        policy = make_policy(self.bot_policy) if bots else None
+        if hasattr(policy, 'prepare'):
+            policy.prepare(arena)
+        rng = random.Random()
+        latency = LatencyMeter()
+        recorder = Recorder(arena, self.tick_rate) if self.replay_dir is not None else None
         stop = False
-        pygame.display.init()
         winner = None
 
-        """FADE IN TO BEGIN GAME"""
-        fade_out_message(screen, clock, BLUE, "3")
-        fade_out_message(screen, clock, BLUE, "2")
-        fade_out_message(screen, clock, BLUE, "1")
-        fade_out_message(screen, clock, BLUE, "GO")
+        """FADE IN TO BEGIN GAME, ANY KEY SKIPS IT"""
+        if not countdown(screen, clock, BLUE):
+            return None
 
-        """GAME LOOP"""
+        """FIRST FRAME, AFTER THIS ONLY WHAT CHANGES IS REDRAWN"""
+        view.draw_all(screen)
+        self.shown_points = None
+        self.text_rects = []
+        self.update_text(screen, view)
+        pygame.display.flip()
+
+        """
+        GAME LOOP
+        Every frame the input is read and the screen is drawn, while the game itself ticks at self.tick_rate.
+        When drawing falls behind, the ticks that are due all run before the next frame is drawn.
+        """
+        sim_clock = FixedStepClock(self.tick_rate)
+        profiler = self.profiler
+        clock.tick()
         while stop is False:
+            sim_clock.add_time(clock.tick(RENDER_FPS) / 1000.0)
+            profiler.mark('wait')
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:  # user clicks close
-                    stop = True
-                    pygame.quit()
+                    return None
                 elif event.type == pygame.KEYDOWN:
-                    if event.key in DIR_KEYS_1:
-                        new_dir = DIRECTIONS[DIR_KEYS_1.index(event.key)]
-                        if not opposite_direction(new_dir, directions[0]):
-                            directions[0] = new_dir
-                    if event.key in DIR_KEYS_2:
-                        new_dir = DIRECTIONS[DIR_KEYS_2.index(event.key)]
-                        if not opposite_direction(new_dir, directions[1]):
-                            directions[1] = new_dir
-            if stop is False:
-                screen.fill((0,0,0))
-                arena.components.draw(screen)
-                arena.draw_border(screen, (0,255,255))
+                    # only as many key sets as there are human players steer a snake
+                    for player, keys in zip(inputs, PLAYER_KEYS):
+                        if event.key in keys:
+                            player.push(DIRECTIONS[keys.index(event.key)], pygame.time.get_ticks())
+                    if event.key == PROFILER_KEY:
+                        self.overlay.toggle()
+            profiler.mark('events')
+            rects = []
+            while stop is False and sim_clock.tick_due():
+                directions = []
+                for player in inputs:
+                    direction, pressed = player.pop_turn()
+                    directions.append(direction)
+                    latency.applied(pressed)
+                for snake in bots:
+                    directions.append(policy(arena, snake, rng) if snake.alive else snake.direction)
+                if recorder is not None:
+                    recorder.record(directions)
                 arena.move_snakes(directions)
-                self.update_text(screen, arena)
-                pygame.display.flip()
-                loser = arena.detect_collisions()
-                if loser is not False:
-                    if loser is None:
-                        winner = None
-                    else:
-                        index = arena.snakes.index(loser)
-                        if len(arena.snakes)>1 and index == 0:
-                            winner = arena.snakes[1]
-                        else:
-                            winner = arena.snakes[0]
+                profiler.mark('move')
+                arena.detect_collisions()
+                profiler.mark('collisions')
+                rects.extend(view.draw_changes(screen))
+                profiler.mark('draw')
+                if arena.game_over() or not any(snake.alive for snake in humans):
+                    winner = arena.winner()
                     stop = True
-                pygame.display.flip()
-                clock.tick(10)
+            if stop is False:
+                rects.extend(view.draw_motion(screen, sim_clock.alpha()))
+                profiler.mark('draw')
+                rects.extend(self.update_text(screen, view))
+                profiler.mark('text')
+                rects.extend(self.overlay.draw(screen, view.background))
+                profiler.mark('overlay')
+                pygame.display.update(rects)
+                latency.presented(pygame.time.get_ticks())
+                profiler.mark('present')
+            profiler.end_frame()
+
+        if recorder is not None:
+            recorder.save(replay_path(self.replay_dir, arena))
+
+        stats = latency.summary()
+        if stats['count']:
+            print 'Input latency over %d turns: median %d ms, 95th percentile %d ms, max %d ms' % (stats['count'], stats['p50'], stats['p95'], stats['max'])
+        if hasattr(policy, 'summary'):
+            stats = policy.summary()
+            print 'Computer snake: %d moves, %d fell back to the quick heuristic, %d over budget, slowest %d us' % (
+                stats['decisions'], stats['fallbacks'], stats['over_budget'], stats['slowest'])
 
         """AFTER GAME MENU"""
         points = []
         if len(arena.snakes)>1:
             if winner is not None:
-                winner.points += 1000
+                winner.points += WIN_POINTS
             menu = Game_Over_Menu_Multi(screen, arena.snakes, winner)
             menu.run()
             for snake in arena.snakes:
@@ -325,33 +255,26 @@ class Game():
             points.append(0)
 
         event = pygame.event.wait()
-        while not (event.type == pygame.KEYDOWN and (event.key == pygame.K_q or event.key == pygame.K_RETURN)):
+        while not (event.type == pygame.QUIT or
+                   (event.type == pygame.KEYDOWN and (event.key == pygame.K_q or event.key == pygame.K_RETURN))):
             event = pygame.event.wait()
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_q:
-                pygame.quit()
-            elif event.key == pygame.K_RETURN:
-                arena = Arena(screen.get_rect().centerx-arena.grid_size[0]*WIDTH/2, screen.get_rect().centery-arena.grid_size[1]*HEIGHT/2, 20, arena.grid_size, arena.option, points)
-                clock = pygame.time.Clock()
-                self.main_loop(screen, arena, clock)
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+            return points
+        return None
 
 
 class Game_Over_Menu_Single(object):
     def __init__(self, screen, snakes):
         self.screen = screen
         self.snakes = snakes
-        self.font1 = pygame.font.SysFont('Couriernew', 75)
-        self.font1.set_bold(True)
-        self.font2 = pygame.font.SysFont('Couriernew', 50)
-        self.font3 = pygame.font.SysFont("Couriernew", 25)
         self.menu = pygame.Rect(self.screen.get_rect().centerx-400, self.screen.get_rect().centery-250, 800, 500)
 
     def run(self):
         text = []
-        text.append(self.font1.render("You lose!!!", True, self.snakes[0].color))
-        text.append(self.font2.render("Points: "+str(self.snakes[0].points), True, (0,255,255)))
-        text.append(self.font3.render("Press ENTER to play again or", True, (255, 255, 0)))
-        text.append(self.font3.render("press Q to quit", True, (255,255,0)))
+        text.append(render_text("You lose!!!", 75, self.snakes[0].color, bold=True))
+        text.append(render_text("Points: "+str(self.snakes[0].points), 50, (0,255,255)))
+        text.append(render_text("Press ENTER to play again or", 25, (255, 255, 0)))
+        text.append(render_text("press Q to quit", 25, (255,255,0)))
         vertical_pos = [self.menu.y+50, self.menu.y+250, self.menu.y+400, self.menu.y+425]
 
         self.screen.fill((0,0,0))
@@ -369,23 +292,27 @@ class Game_Over_Menu_Multi(object):
         self.screen = screen
         self.snakes = snakes
         self.winner = winner
-        self.font1 = pygame.font.SysFont('Couriernew', 75)
-        self.font1.set_bold(True)
-        self.font2 = pygame.font.SysFont('Couriernew', 50)
-        self.font3 = pygame.font.SysFont("Couriernew", 25)
         self.menu = pygame.Rect(self.screen.get_rect().centerx-400, self.screen.get_rect().centery-250, 800, 500)
 
     def run(self):
         text = []
-        if self.winner == None:
-            text.append(self.font1.render(" Tie", True, (0,255,255)))
+        if self.winner is not None:
+            text.append(render_text(self.winner.name+" wins!!!", 75, self.winner.color, bold=True))
+        elif any(snake.alive for snake in self.snakes):
+            text.append(render_text("Game over", 75, (0,255,255), bold=True))
         else:
-            text.append(self.font1.render(self.winner.name+" wins!!!", True, self.winner.color))
-        text.append(self.font2.render(self.snakes[0].name+" has "+str(self.snakes[0].points)+" points!", True, (0,255,255)))
-        text.append(self.font2.render(self.snakes[1].name+" has "+str(self.snakes[1].points)+" points!", True, (0,255,255)))
-        text.append(self.font3.render("Press ENTER to play again or", True, (255, 255, 0)))
-        text.append(self.font3.render("Q to exit the game", True, (255,255,0)))
-        vertical_pos = [self.menu.y+50, self.menu.y+200, self.menu.y+250, self.menu.y+400, self.menu.y+425]
+            text.append(render_text(" Tie", 75, (0,255,255), bold=True))
+        # with more snakes than fit, the ones with the most points
+        listed = self.snakes
+        if len(listed) > SCORE_SNAKES:
+            listed = sorted(listed, key=lambda snake: -snake.points)[:SCORE_SNAKES]
+        for snake in listed:
+            text.append(render_text(snake.name+" has "+str(snake.points)+" points!", 50, (0,255,255)))
+        text.append(render_text("Press ENTER to play again or", 25, (255, 255, 0)))
+        text.append(render_text("Q to exit the game", 25, (255,255,0)))
+        vertical_pos = [self.menu.y+50]
+        vertical_pos += [self.menu.y+200+50*i for i in range(len(listed))]
+        vertical_pos += [self.menu.y+400, self.menu.y+425]
 
         self.screen.fill((0,0,0))
         pygame.draw.rect(self.screen, (0, 0, 255), self.menu, 0)
@@ -396,4 +323,9 @@ class Game_Over_Menu_Multi(object):
             self.screen.blit(text[i], textpos)
         pygame.display.flip()
 
-game = Game()
+def main():
+    """Starts the game, timing its startup from when this module was imported"""
+    Game(StageTimer(STARTED))
+
+if __name__ == '__main__':
+    main()
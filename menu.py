@@ -74,6 +74,7 @@
 #---[ Imports ]-----------------------------------------------------------------
 #-------------------------------------------------------------------------------
 import pygame
+from assets import get_font
 
 
 #-------------------------------------------------------------------------------
@@ -143,7 +144,7 @@ class cMenu:
                 buttonList):
       ## menu items
       self.menu_items = []                      # List of menu items
-      self.font = pygame.font.SysFont('Couriernew', 25)    # Font to use
+      self.font = get_font(25)                  # Font to use
 
       self.x = x                                # Top left corner (of surface)
       self.y = y                                # relative to the screen/window
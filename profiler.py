@@ -0,0 +1,134 @@
+"""
+Per-phase frame timing for the game loop.
+
+The loop calls mark(phase) after each phase of a frame; the time since the
+previous mark is added to that phase.  end_frame() stores the frame's totals
+in a rolling window per phase, from which the overlay and the dump report the
+50th/95th/99th percentiles.  While the profiler is disabled every call returns
+straight away.
+"""
+import json
+import os
+import pygame
+from collections import OrderedDict, deque
+from timeit import default_timer
+
+from timing import percentile
+from assets import get_font
+
+
+MAX_FRAMES = 600 # frames kept per phase, 10 seconds at 60 fps
+OVERLAY_REFRESH = 0.5 # seconds between updates of the overlay text
+PROFILE_ENV = 'PYSNAKE_PROFILE' # set to a file name to profile from the start and dump there on exit
+DEFAULT_DUMP = 'profile.json'
+
+class Profiler:
+    def __init__(self, enabled=False, max_frames=MAX_FRAMES):
+        self.enabled = enabled
+        self.max_frames = max_frames
+        self.phases = OrderedDict() # phase -> deque of seconds per frame
+        self.frame = OrderedDict()
+        self.last = None
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        self.frame = OrderedDict()
+        self.last = None
+
+    def mark(self, phase):
+        """Adds the time since the previous mark (or the start of the frame) to phase"""
+        if not self.enabled:
+            return
+        now = default_timer()
+        if self.last is not None:
+            self.frame[phase] = self.frame.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        for phase, seconds in self.frame.iteritems():
+            if phase not in self.phases:
+                self.phases[phase] = deque(maxlen=self.max_frames)
+            self.phases[phase].append(seconds)
+        self.frame = OrderedDict()
+
+    def summary(self):
+        """Returns phase -> dictionary of frames counted and p50/p95/p99 in milliseconds"""
+        stats = OrderedDict()
+        for phase, samples in self.phases.iteritems():
+            values = sorted(samples)
+            stats[phase] = {'frames': len(values),
+                            'p50': percentile(values, 0.5) * 1000,
+                            'p95': percentile(values, 0.95) * 1000,
+                            'p99': percentile(values, 0.99) * 1000}
+        return stats
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+def from_environment():
+    """Returns a profiler that is enabled if PYSNAKE_PROFILE is set, and the file to dump it to"""
+    path = os.environ.get(PROFILE_ENV)
+    return Profiler(enabled=bool(path)), path or DEFAULT_DUMP
+
+
+class ProfilerOverlay:
+    """Draws the profiler's percentiles in the top left corner of the screen"""
+    def __init__(self, profiler, x=10, y=10, size=18, color=(255,255,0)):
+        self.profiler = profiler
+        self.x = x
+        self.y = y
+        self.size = size
+        self.color = color
+        self.visible = False
+        self.always = profiler.enabled # collecting even while the overlay is hidden
+        self.rect = None # area drawn last time
+        self.last_refresh = None
+
+    def toggle(self):
+        """Shows or hides the overlay; the profiler only collects while it is shown, unless it was enabled to begin with"""
+        self.visible = not self.visible
+        self.profiler.enable(self.visible or self.always)
+        self.last_refresh = None
+
+    """
+    Redraws the overlay every OVERLAY_REFRESH seconds; returns the rects that were drawn
+    background is the color under the overlay, or a surface the size of the screen to copy it from
+    """
+    def draw(self, screen, background=(0,0,0)):
+        rects = []
+        if not self.visible:
+            if self.rect is not None:
+                clear(screen, background, self.rect)
+                rects.append(self.rect)
+                self.rect = None
+            return rects
+        now = default_timer()
+        if self.last_refresh is not None and now - self.last_refresh < OVERLAY_REFRESH:
+            return rects
+        self.last_refresh = now
+        font = get_font(self.size)
+        lines = ["%-11s %6s %6s %6s" % ("phase (ms)", "p50", "p95", "p99")]
+        for phase, stats in self.profiler.summary().iteritems():
+            lines.append("%-11s %6.2f %6.2f %6.2f" % (phase, stats['p50'], stats['p95'], stats['p99']))
+        # rendered directly, these strings change every refresh and would only churn the text cache
+        texts = [font.render(line, True, self.color) for line in lines]
+        height = font.get_linesize()
+        rect = pygame.Rect(self.x, self.y, max(text.get_width() for text in texts), height * len(texts))
+        if self.rect is not None:
+            clear(screen, background, self.rect)
+            rects.append(self.rect)
+        clear(screen, background, rect)
+        for i, text in enumerate(texts):
+            screen.blit(text, (self.x, self.y + i * height))
+        rects.append(rect)
+        self.rect = rect
+        return rects
+
+def clear(screen, background, rect):
+    if isinstance(background, pygame.Surface):
+        screen.blit(background, rect, rect)
+    else:
+        screen.fill(background, rect)
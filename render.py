@@ -0,0 +1,361 @@
+"""
+Draws an engine Arena with pygame.
+
+The whole arena is drawn once when a game starts.  After that only the cells
+the engine reports as changed are repainted, and the caller hands the returned
+rects to pygame.display.update.
+
+What does not change during a game, the background and the border around the
+arena, is drawn once on a surface the size of the screen (the background
+layer).  A game starts by blitting it, and emptied cells, or anything else
+drawn over it, are restored by copying the same area back from it.
+
+Between ticks the new head of each snake slides into its cell and the tail
+slides out of the cell it left (draw_motion), so the snakes move smoothly
+however slow the tick rate is.
+
+GridView is another way of drawing, for boards too big for the screen at full
+size: the grid is turned into an image with one pixel per cell and scaled onto
+the screen in a single blit, with cells as small as GRID_VIEW_MIN_CELL pixels,
+so a frame costs the same however many cells are filled.  It needs NumPy.
+
+CameraView is for boards too big for the screen even then: it shows a window of
+the board that follows a snake's head and only draws the cells inside it, so a
+frame costs the same however big the board is.
+"""
+import pygame
+
+from engine import EMPTY, FOOD, FOOD_COLOR, SNAKE_CODE
+from assets import get_cell
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+WIDTH = 10
+HEIGHT = 10
+BACKGROUND = (0,0,0)
+BORDER_COLOR = (0,255,255)
+OPEN_EDGE_COLOR = (0,60,60) # sides of a CameraView where the board carries on past the window
+GRID_VIEW_MIN_CELL = 4 # pixels per side of the smallest cells GridView shrinks a board to, below that it scrolls
+CAMERA_MARGIN = 0.25 # the camera moves when the head comes this close (as a fraction of the window) to its edge
+
+class ArenaView:
+    """Places an engine Arena on the screen and draws it"""
+    def __init__(self, arena, x, y, border_width):
+        self.arena = arena
+        self.x = x
+        self.y = y
+        self.border_width = border_width
+        self.tails = [] # where each snake's tail was at the last tick
+        self.motion = [] # (row, col, color, direction, entering) for the cells moving since the last tick
+        self.background = None # static layer, built by draw_all
+
+    def get_col_left_loc(self, col, width=WIDTH):
+        return self.x + col * width
+
+    def get_row_top_loc(self, row, height=HEIGHT):
+        return self.y + row * height
+
+    def get_cell_rect(self, row, col):
+        return pygame.Rect(self.get_col_left_loc(col), self.get_row_top_loc(row), WIDTH, HEIGHT)
+
+    def get_screen_rect(self):
+        """Returns the part of the screen the cells are drawn on"""
+        return pygame.Rect(self.x, self.y, self.arena.grid_size[1] * WIDTH, self.arena.grid_size[0] * HEIGHT)
+
+    def visible(self, row, col):
+        return True
+
+    def cell_color(self, code):
+        if code == FOOD:
+            return FOOD_COLOR
+        elif code >= SNAKE_CODE:
+            return self.arena.snakes[code - SNAKE_CODE].color
+        return BACKGROUND
+
+    def draw(self, screen):
+        for snake in self.arena.snakes:
+            if not snake.alive:
+                continue
+            cell = get_cell(snake.color, WIDTH, HEIGHT)
+            for part in snake.body_parts:
+                screen.blit(cell, (self.get_col_left_loc(part.col), self.get_row_top_loc(part.row)))
+        cell = get_cell(FOOD_COLOR, WIDTH, HEIGHT)
+        for bite in self.arena.food:
+            screen.blit(cell, (self.get_col_left_loc(bite.col), self.get_row_top_loc(bite.row)))
+
+    def build_background(self, screen):
+        """Returns the static layer for the screen: the background with the border drawn on it"""
+        layer = pygame.Surface(screen.get_size(), 0, screen)
+        layer.fill(BACKGROUND)
+        self.draw_border(layer, BORDER_COLOR)
+        return layer
+
+    def restore(self, screen, rect):
+        """Copies the rect of the static layer back onto the screen, wiping whatever was drawn over it"""
+        screen.blit(self.background, rect, rect)
+
+    def draw_all(self, screen):
+        """Draws the static layer, built the first time, and the whole arena, then starts tracking changes for draw_changes"""
+        if self.background is None or self.background.get_size() != screen.get_size():
+            self.background = self.build_background(screen)
+        screen.blit(self.background, (0, 0))
+        self.draw(screen)
+        self.arena.track_changes()
+        self.tails = [snake.body_parts[-1].get_loc() for snake in self.arena.snakes]
+        self.motion = []
+
+    """
+    Repaints the cells that changed since the last call, which should be made after every tick
+    Returns the rects that were drawn
+    """
+    def draw_changes(self, screen):
+        rects = []
+        cols = self.arena.grid_size[1]
+        grid = self.arena.grid
+        indices = self.arena.pop_changes()
+        for row, col, color, direction, entering in self.motion: # finish the cells left half drawn
+            indices.append(self.arena.cell_index(row, col))
+        for index in indices:
+            row, col = divmod(index, cols)
+            if not self.visible(row, col):
+                continue
+            rect = self.get_cell_rect(row, col)
+            code = grid[index]
+            if code == EMPTY:
+                screen.blit(self.background, rect, rect)
+            else:
+                screen.blit(get_cell(self.cell_color(code), WIDTH, HEIGHT), rect)
+            rects.append(rect)
+        self.update_motion()
+        return rects
+
+    def update_motion(self):
+        """Works out the cells that move after a tick: each snake's new head and the cell its tail left"""
+        self.motion = []
+        for snake, tail in zip(self.arena.snakes, self.tails):
+            if not snake.alive:
+                continue
+            head = snake.body_parts[0]
+            if self.arena.in_bounds(head.row, head.col) and self.arena.cell_at(head.row, head.col) == snake.code:
+                self.motion.append((head.row, head.col, snake.color, snake.direction, True))
+            new_tail = snake.body_parts[-1]
+            if tail != new_tail.get_loc() and self.arena.in_bounds(*tail) and self.arena.cell_at(*tail) == EMPTY:
+                direction = (tail[0] - new_tail.row, tail[1] - new_tail.col)
+                self.motion.append((tail[0], tail[1], snake.color, direction, False))
+        self.tails = [snake.body_parts[-1].get_loc() for snake in self.arena.snakes]
+
+    """
+    Draws the moving cells alpha of the way (0 to 1) from the last tick to the next one
+    Returns the rects that were drawn
+    """
+    def draw_motion(self, screen, alpha):
+        rects = []
+        for row, col, color, direction, entering in self.motion:
+            if not self.visible(row, col):
+                continue
+            rect = self.get_cell_rect(row, col)
+            screen.blit(self.background, rect, rect)
+            if entering:
+                screen.fill(color, partial_rect(rect, direction, alpha))
+            else:
+                screen.fill(color, partial_rect(rect, direction, 1 - alpha))
+            rects.append(rect)
+        return rects
+
+    def draw_border(self, screen, color):
+        field = self.get_screen_rect()
+        width = field.width + 1.5*self.border_width
+        height = field.height + 1.5*self.border_width
+        rect = pygame.Rect(field.x-self.border_width/2, field.y-self.border_width/2, width, height)
+        pygame.draw.rect(screen, color, rect, self.border_width)
+
+
+class GridView(ArenaView):
+    """Draws the arena by scaling a one pixel per cell image of the grid onto the screen, cell pixels per cell"""
+    def __init__(self, arena, x, y, border_width, cell=WIDTH):
+        if numpy is None:
+            raise ImportError("GridView needs NumPy")
+        ArenaView.__init__(self, arena, x, y, border_width)
+        rows, cols = arena.grid_size
+        self.cell = cell
+        self.rect = pygame.Rect(x, y, cols * cell, rows * cell)
+        self.cells = numpy.frombuffer(arena.grid, dtype=numpy.uint8).reshape(rows, cols) # shares memory with the grid
+        self.pixels = numpy.zeros((cols, rows, 3), dtype=numpy.uint8) # surfarray arrays are indexed [x][y]
+        # 32 bit like the screen Game sets up, so the final blit needs no conversion
+        self.image = pygame.Surface((cols, rows), 0, 32)
+        self.scaled = pygame.Surface(self.rect.size, 0, self.image)
+        self.update_palette()
+
+    def get_cell_rect(self, row, col):
+        return pygame.Rect(self.x + col * self.cell, self.y + row * self.cell, self.cell, self.cell)
+
+    def get_screen_rect(self):
+        return self.rect
+
+    def update_palette(self):
+        """Builds the table from grid values to colors, needed again if the snakes change"""
+        self.palette = numpy.zeros((256, 3), dtype=numpy.uint8)
+        self.palette[EMPTY] = BACKGROUND
+        self.palette[FOOD] = FOOD_COLOR
+        for i, snake in enumerate(self.arena.snakes):
+            self.palette[SNAKE_CODE + i] = snake.color
+
+    def draw(self, screen):
+        numpy.take(self.palette, self.cells.T, axis=0, out=self.pixels)
+        pygame.surfarray.blit_array(self.image, self.pixels)
+        pygame.transform.scale(self.image, self.rect.size, self.scaled)
+        screen.blit(self.scaled, self.rect)
+
+    def draw_changes(self, screen):
+        """Redraws the whole arena if anything changed since the last call; returns the rects that were drawn"""
+        if not self.arena.pop_changes() and not self.motion:
+            return []
+        self.draw(screen)
+        self.update_motion()
+        return [self.rect]
+
+
+def partial_rect(rect, direction, fraction):
+    """Returns the part of rect, fraction of its size, on the side a snake moving in direction enters from"""
+    part = rect.copy()
+    if direction[1] != 0:
+        part.width = int(rect.width * fraction)
+        if direction[1] < 0:
+            part.right = rect.right
+    else:
+        part.height = int(rect.height * fraction)
+        if direction[0] < 0:
+            part.bottom = rect.bottom
+    return part
+
+class CameraView(ArenaView):
+    """Shows the window of a board too big for the screen around a snake's head, drawing only the cells in it"""
+    def __init__(self, arena, viewport, border_width, follow=None):
+        ArenaView.__init__(self, arena, viewport.x, viewport.y, border_width)
+        self.rows = min(viewport.height / HEIGHT, arena.grid_size[0]) # size of the window in cells
+        self.cols = min(viewport.width / WIDTH, arena.grid_size[1])
+        self.viewport = pygame.Rect(viewport.x, viewport.y, self.cols * WIDTH, self.rows * HEIGHT)
+        if follow is None and arena.snakes:
+            follow = arena.snakes[0]
+        self.follow = follow
+        self.top = 0 # first row and column in the window
+        self.left = 0
+        self.center_on_head()
+
+    def move_to(self, top, left):
+        self.top = max(0, min(top, self.arena.grid_size[0] - self.rows))
+        self.left = max(0, min(left, self.arena.grid_size[1] - self.cols))
+        self.x = self.viewport.x - self.left * WIDTH
+        self.y = self.viewport.y - self.top * HEIGHT
+
+    def center_on_head(self):
+        if self.follow is not None:
+            head = self.follow.body_parts[0]
+            self.move_to(head.row - self.rows / 2, head.col - self.cols / 2)
+
+    def head_near_edge(self):
+        """Returns true if the followed head is close to a side of the window that the board carries on past"""
+        if self.follow is None:
+            return False
+        head = self.follow.body_parts[0]
+        if not self.arena.in_bounds(head.row, head.col):
+            return False
+        margin_rows = int(self.rows * CAMERA_MARGIN)
+        margin_cols = int(self.cols * CAMERA_MARGIN)
+        rows, cols = self.arena.grid_size
+        return ((head.row < self.top + margin_rows and self.top > 0) or
+                (head.row >= self.top + self.rows - margin_rows and self.top + self.rows < rows) or
+                (head.col < self.left + margin_cols and self.left > 0) or
+                (head.col >= self.left + self.cols - margin_cols and self.left + self.cols < cols))
+
+    def draw_all(self, screen):
+        """Centers the window on the followed head, which has moved if the arena was reset, and draws it"""
+        self.center_on_head()
+        if self.background is not None:
+            self.draw_border(self.background, BORDER_COLOR)
+        ArenaView.draw_all(self, screen)
+
+    def get_screen_rect(self):
+        return self.viewport
+
+    def visible(self, row, col):
+        return self.top <= row < self.top + self.rows and self.left <= col < self.left + self.cols
+
+    def draw(self, screen):
+        self.restore(screen, self.viewport)
+        grid = self.arena.grid
+        cols = self.arena.grid_size[1]
+        for row in xrange(self.top, self.top + self.rows):
+            start = row * cols + self.left
+            line = grid[start:start + self.cols]
+            if not any(line):
+                continue
+            y = self.get_row_top_loc(row)
+            for i, code in enumerate(line):
+                if code != EMPTY:
+                    screen.blit(get_cell(self.cell_color(code), WIDTH, HEIGHT), (self.viewport.x + i * WIDTH, y))
+
+    def draw_changes(self, screen):
+        """Moves the window and redraws it when the head nears its edge, otherwise repaints the changed cells in it"""
+        if not self.head_near_edge():
+            return ArenaView.draw_changes(self, screen)
+        self.arena.pop_changes()
+        self.center_on_head()
+        outer = self.draw_border(self.background, BORDER_COLOR) # the open sides may have changed
+        self.restore(screen, outer)
+        self.draw(screen)
+        self.update_motion()
+        return [outer]
+
+    def draw_border(self, screen, color):
+        """Draws the border around the window, dimmed on the sides where the board carries on; returns its rect"""
+        width = self.border_width
+        outer = self.viewport.inflate(2 * width, 2 * width)
+        rows, cols = self.arena.grid_size
+        sides = [(pygame.Rect(outer.left, outer.top, outer.width, width), self.top == 0),
+                 (pygame.Rect(outer.left, self.viewport.bottom, outer.width, width), self.top + self.rows == rows),
+                 (pygame.Rect(outer.left, outer.top, width, outer.height), self.left == 0),
+                 (pygame.Rect(self.viewport.right, outer.top, width, outer.height), self.left + self.cols == cols)]
+        for rect, wall in sides:
+            if wall:
+                screen.fill(color, rect)
+            else:
+                screen.fill(OPEN_EDGE_COLOR, rect)
+        return outer
+
+
+def fit_cell(grid_size, area):
+    """Returns the most pixels per side, up to the full WIDTH, the cells can take for the board to fit in the area"""
+    return min(WIDTH, HEIGHT, area.width / grid_size[1], area.height / grid_size[0])
+
+def scrolls(grid_size, area, grid_view=None):
+    """Returns true if make_view shows a board of the given size in the area through a CameraView"""
+    if grid_view is None:
+        grid_view = numpy is not None
+    return fit_cell(grid_size, area) < (GRID_VIEW_MIN_CELL if grid_view else WIDTH)
+
+def make_view(arena, area, border_width, follow=None, grid_view=None):
+    """
+    Returns the view to draw the arena with, centered in the area of the screen it can take up
+    Boards that fit at full size get an ArenaView, boards that fit with smaller cells a GridView if NumPy is
+    available, and the others a CameraView following the given snake (the first one by default)
+    grid_view True draws boards that fit at full size with GridView too, and False never uses GridView
+    """
+    cell = fit_cell(arena.grid_size, area)
+    if scrolls(arena.grid_size, area, grid_view):
+        width = arena.grid_size[1] * WIDTH
+        height = arena.grid_size[0] * HEIGHT
+        viewport = pygame.Rect(0, 0, min(width, area.width), min(height, area.height))
+        viewport.center = area.center
+        return CameraView(arena, viewport, border_width, follow)
+    x = area.centerx - arena.grid_size[1] * cell / 2
+    y = area.centery - arena.grid_size[0] * cell / 2
+    if grid_view is None:
+        grid_view = cell < WIDTH
+    if grid_view:
+        return GridView(arena, x, y, border_width, cell)
+    return ArenaView(arena, x, y, border_width)
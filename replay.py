@@ -0,0 +1,370 @@
+"""
+Recording and playing back games.
+
+A replay is what a game needs to be played again exactly: the size of the
+board, the number of snakes, their points and first directions and the seed
+of the Arena, followed by the directions the snakes were steered in.  Only the
+ticks where a snake's direction changed are stored, so a game costs a few
+bytes per turn taken and nothing for the ticks in between.
+
+After the header the replay is a list of entries, each one
+
+    varint  ticks since the previous entry in which no direction changed
+    byte    number of snakes that changed direction this tick, 0 ends the game
+            and KEYFRAME marks a keyframe
+    changes one byte each, snake index << 2 | direction index, or two bytes
+            (snake index, direction index) when there are more than 64 snakes
+    or, for a keyframe, a varint length and the zlib compressed state of the
+            arena at that tick
+
+The entries are followed by an index of the keyframes (varint count, then a
+varint tick, offset and length for each) and the offset of the index in the
+last four bytes.
+
+Playing back steps an Arena through the recorded directions without drawing,
+as fast as the engine goes.  Seeking restores the state in the last keyframe
+before the tick asked for and plays on from there, so it never plays more than
+a keyframe interval of ticks.
+
+When the recorder stores a keyframe it sorts the arena's free cells first, and
+playing back sorts them at the same tick, so the keyframe does not need to hold
+their order to know where the next food goes.  Sorting goes over the whole
+board, about 10 ms for 200x200 cells but a quarter of a second for 1000x1000,
+so boards bigger than KEYFRAME_CELLS get no keyframes and seeking plays them
+from the start.
+
+    python replay.py game.replay
+    python replay.py --seek 50000 game.replay
+"""
+import argparse
+import os
+import struct
+import time
+import zlib
+from bisect import bisect_right
+
+from engine import Arena, DIRECTIONS, SEED_BITS
+
+
+MAGIC = 'PSRP'
+VERSION = 3 # 3: new food is made once every head has moved, so older games play back differently
+HEADER = struct.Struct('<4sBHHBQH') # magic, version, rows, cols, snakes, seed, tick rate
+SNAKE = struct.Struct('<iB') # points and first direction of each snake
+FOOTER = struct.Struct('<I') # offset of the keyframe index
+NARROW_SNAKES = 64 # most snakes whose changes fit in one byte
+KEYFRAME = 255 # change count that marks a keyframe entry, more than the most snakes an arena holds
+KEYFRAME_INTERVAL = 1000 # ticks between keyframes, 0 for none
+KEYFRAME_CELLS = 200 * 200 # biggest board, in cells, that gets keyframes, since storing one sorts every free cell
+KEYFRAME_LEVEL = 6 # zlib compression level of the keyframes, from 0 (none, fastest) to 9 (smallest)
+DIRECTION_CODES = dict((direction, i) for i, direction in enumerate(DIRECTIONS))
+REPLAY_ENV = 'PYSNAKE_REPLAYS' # set to a directory to save a replay of every game there
+SUFFIX = '.replay'
+
+# keyframe contents, after the direction each snake was last given (one byte each)
+RNG_STATE = struct.Struct('<625I') # the Mersenne Twister words and position of random.Random
+GAUSS = struct.Struct('<Bd') # whether random.Random has a gauss value saved, and the value
+SNAKE_STATE = struct.Struct('<BBiIIii') # alive, direction, points, grow, length, head row and column
+COUNT = struct.Struct('<I') # number of food cells, then each one's grid index
+
+def write_varint(data, value):
+    while value >= 0x80:
+        data.append(value & 0x7f | 0x80)
+        value >>= 7
+    data.append(value)
+
+def read_varint(data, pos):
+    """Returns the value of the varint at pos and the position after it"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+"""
+Returns the compressed keyframe of an arena state from Arena.get_state and the directions the snakes were last
+given.  Each snake's body is stored as its head and the direction from every part to the next, four to a byte
+"""
+def pack_keyframe(state, directions, cols, level=KEYFRAME_LEVEL):
+    rng_state, snakes, food = state
+    data = bytearray(DIRECTION_CODES[direction] for direction in directions)
+    version, words, gauss = rng_state
+    data.extend(RNG_STATE.pack(*words))
+    data.extend(GAUSS.pack(gauss is not None, gauss or 0.0))
+    for alive, direction, points, grow, cells in snakes:
+        data.extend(SNAKE_STATE.pack(alive, DIRECTION_CODES[direction], points, grow, len(cells), cells[0][0], cells[0][1]))
+        steps = [DIRECTION_CODES[(b[0] - a[0], b[1] - a[1])] for a, b in zip(cells, cells[1:])]
+        for i in xrange(0, len(steps), 4):
+            byte = 0
+            for j, code in enumerate(steps[i:i + 4]):
+                byte |= code << 2 * j
+            data.append(byte)
+    data.extend(COUNT.pack(len(food)))
+    for row, col in food:
+        data.extend(COUNT.pack(row * cols + col))
+    return zlib.compress(str(data), level)
+
+def unpack_keyframe(keyframe, snakes, cols):
+    """Returns the directions and the arena state, as Arena.set_state takes it, from a keyframe"""
+    data = bytearray(zlib.decompress(str(keyframe)))
+    directions = [DIRECTIONS[code] for code in data[:snakes]]
+    pos = snakes
+    words = RNG_STATE.unpack_from(data, pos)
+    pos += RNG_STATE.size
+    has_gauss, gauss = GAUSS.unpack_from(data, pos)
+    pos += GAUSS.size
+    rng_state = (3, words, gauss if has_gauss else None)
+    snake_states = []
+    for _ in xrange(snakes):
+        alive, code, points, grow, length, row, col = SNAKE_STATE.unpack_from(data, pos)
+        pos += SNAKE_STATE.size
+        cells = [(row, col)]
+        for i in xrange(length - 1):
+            step = DIRECTIONS[data[pos + i / 4] >> 2 * (i % 4) & 3]
+            row += step[0]
+            col += step[1]
+            cells.append((row, col))
+        pos += (length + 2) / 4
+        snake_states.append((bool(alive), DIRECTIONS[code], points, grow, cells))
+    count, = COUNT.unpack_from(data, pos)
+    pos += COUNT.size
+    food = []
+    for _ in xrange(count):
+        index, = COUNT.unpack_from(data, pos)
+        pos += COUNT.size
+        food.append(divmod(index, cols))
+    return directions, (rng_state, snake_states, food)
+
+
+class Recorder:
+    """
+    Records the directions an arena's snakes are given each tick, from the start of a game, with a keyframe
+    every keyframe_interval ticks compressed at keyframe_level, if the board has at most KEYFRAME_CELLS cells
+    """
+    def __init__(self, arena, tick_rate=0, keyframe_interval=KEYFRAME_INTERVAL, keyframe_level=KEYFRAME_LEVEL):
+        rows, cols = arena.grid_size
+        if not 0 <= arena.seed < 2 ** SEED_BITS:
+            raise ValueError("seed %r does not fit in a replay" % arena.seed)
+        self.arena = arena
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, rows, cols, len(arena.snakes), arena.seed, tick_rate))
+        for snake in arena.snakes:
+            self.data.extend(SNAKE.pack(snake.points, DIRECTION_CODES[snake.direction]))
+        self.last = [snake.direction for snake in arena.snakes]
+        self.wide = len(arena.snakes) > NARROW_SNAKES
+        self.gap = 0 # ticks since the last entry
+        self.tick = 0 # ticks recorded
+        if rows * cols > KEYFRAME_CELLS:
+            keyframe_interval = 0
+        self.keyframe_interval = keyframe_interval
+        self.keyframe_level = keyframe_level
+        self.next_keyframe = keyframe_interval if keyframe_interval > 0 else -1
+        self.keyframes = [] # (tick, offset, length) of each keyframe
+        self.finished = False
+
+    def record(self, directions):
+        """Records the directions handed to the arena for one tick, before the tick is played"""
+        if self.tick == self.next_keyframe:
+            self.add_keyframe()
+        self.tick += 1
+        if directions == self.last:
+            self.gap += 1
+            return
+        changes = [(i, DIRECTION_CODES[direction])
+                   for i, (direction, last) in enumerate(zip(directions, self.last)) if direction != last]
+        data = self.data
+        write_varint(data, self.gap)
+        data.append(len(changes))
+        for i, code in changes:
+            if self.wide:
+                data.append(i)
+                data.append(code)
+            else:
+                data.append(i << 2 | code)
+        self.last = list(directions)
+        self.gap = 0
+
+    def add_keyframe(self):
+        """Stores the arena's state as it is now, sorting its free cells first as playing back will"""
+        self.arena.sort_free()
+        keyframe = pack_keyframe(self.arena.get_state(), self.last, self.arena.grid_size[1], self.keyframe_level)
+        data = self.data
+        write_varint(data, self.gap)
+        data.append(KEYFRAME)
+        write_varint(data, len(keyframe))
+        self.keyframes.append((self.tick, len(data), len(keyframe)))
+        data.extend(keyframe)
+        self.gap = 0
+        self.next_keyframe += self.keyframe_interval
+
+    def finish(self):
+        """Ends the replay; returns its bytes"""
+        if not self.finished:
+            data = self.data
+            write_varint(data, self.gap)
+            data.append(0)
+            index = len(data)
+            write_varint(data, len(self.keyframes))
+            for tick, offset, length in self.keyframes:
+                write_varint(data, tick)
+                write_varint(data, offset)
+                write_varint(data, length)
+            data.extend(FOOTER.pack(index))
+            self.finished = True
+        return self.data
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.finish())
+
+
+class Replay:
+    """A recorded game read back from its bytes"""
+    def __init__(self, data):
+        self.data = bytearray(data)
+        magic, version, rows, cols, snakes, seed, tick_rate = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a version %d replay" % VERSION)
+        self.grid_size = (rows, cols)
+        self.snakes = snakes
+        self.seed = seed
+        self.tick_rate = tick_rate
+        pos = HEADER.size
+        self.points = []
+        self.first_directions = []
+        for _ in xrange(snakes):
+            points, code = SNAKE.unpack_from(self.data, pos)
+            self.points.append(points)
+            self.first_directions.append(DIRECTIONS[code])
+            pos += SNAKE.size
+        self.start = pos # first entry
+        pos, = FOOTER.unpack_from(self.data, len(self.data) - FOOTER.size)
+        count, pos = read_varint(self.data, pos)
+        self.keyframe_ticks = []
+        self.keyframes = [] # (offset, length) of each keyframe
+        for _ in xrange(count):
+            tick, pos = read_varint(self.data, pos)
+            offset, pos = read_varint(self.data, pos)
+            length, pos = read_varint(self.data, pos)
+            self.keyframe_ticks.append(tick)
+            self.keyframes.append((offset, length))
+
+    def new_arena(self):
+        """Returns an Arena in the state the recorded game started in"""
+        return Arena(self.grid_size, self.snakes, list(self.points), self.seed)
+
+    """
+    Steps arena through the recorded ticks, from the start of the game or from start, the position of an entry
+    and the directions the snakes were last given there
+    Stops after the given number of ticks, or at the end of the game; returns the number of ticks played
+    """
+    def run(self, arena, ticks=None, start=None):
+        data = self.data
+        wide = self.snakes > NARROW_SNAKES
+        if start is None:
+            pos, current = self.start, list(self.first_directions)
+        else:
+            pos, current = start[0], list(start[1])
+        played = 0
+        while True:
+            gap, pos = read_varint(data, pos)
+            for _ in xrange(gap):
+                if played == ticks:
+                    return played
+                arena.tick(current)
+                played += 1
+            count = data[pos]
+            pos += 1
+            if count == 0:
+                return played
+            if count == KEYFRAME:
+                length, pos = read_varint(data, pos)
+                pos += length
+                arena.sort_free() # as the recorder did
+                continue
+            if played == ticks:
+                return played
+            for _ in xrange(count):
+                if wide:
+                    current[data[pos]] = DIRECTIONS[data[pos + 1]]
+                    pos += 2
+                else:
+                    current[data[pos] >> 2] = DIRECTIONS[data[pos] & 3]
+                    pos += 1
+            arena.tick(current)
+            played += 1
+
+    def seek(self, tick, arena=None):
+        """
+        Returns an arena, a new one or the given one reset, as it was after the first tick ticks of the game
+        (or at its end), restored from the last keyframe before then
+        """
+        if arena is None:
+            arena = self.new_arena()
+        else:
+            arena.reset(list(self.points), self.seed)
+        i = bisect_right(self.keyframe_ticks, tick) - 1
+        if i < 0:
+            self.run(arena, tick)
+            return arena
+        offset, length = self.keyframes[i]
+        directions, state = unpack_keyframe(self.data[offset:offset + length], self.snakes, self.grid_size[1])
+        arena.set_state(*state)
+        self.run(arena, tick - self.keyframe_ticks[i], (offset + length, directions))
+        return arena
+
+def load(path):
+    with open(path, 'rb') as f:
+        return Replay(f.read())
+
+def play(replay, arena=None):
+    """Plays the replay through to the end on a new arena, or on the given one reset to the start; returns it"""
+    if arena is None:
+        arena = replay.new_arena()
+    else:
+        arena.reset(list(replay.points), replay.seed)
+    replay.run(arena)
+    return arena
+
+def from_environment():
+    """Returns the directory PYSNAKE_REPLAYS names to save replays in, creating it, or None if it is not set"""
+    directory = os.environ.get(REPLAY_ENV)
+    if not directory:
+        return None
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    return directory
+
+def replay_path(directory, arena):
+    """Returns a file name for a replay of a game on arena that starts now"""
+    return os.path.join(directory, "%s-%d%s" % (time.strftime('%Y%m%d-%H%M%S'), arena.seed, SUFFIX))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play PySnake replays back without a display")
+    parser.add_argument('paths', nargs='+', metavar='REPLAY')
+    parser.add_argument('--seek', type=int, metavar='TICK', help="also time seeking to this tick")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        replay = load(path)
+        arena = replay.new_arena()
+        start = time.time()
+        ticks = replay.run(arena)
+        seconds = time.time() - start
+        winner = arena.winner()
+        print "%s: %dx%d, %d snakes, %d ticks in %.3fs (%.0f ticks/sec)" % (
+            path, replay.grid_size[0], replay.grid_size[1], replay.snakes, ticks, seconds,
+            ticks / seconds if seconds > 0 else float('inf'))
+        print "  points %s, %s" % (", ".join("%s %d" % (snake.name, snake.points) for snake in arena.snakes),
+                                    "%s wins" % winner.name if winner is not None else "no winner")
+        if args.seek is not None:
+            start = time.time()
+            arena = replay.seek(args.seek, arena)
+            print "  seek to tick %d: %.1f ms, %s" % (args.seek, (time.time() - start) * 1000,
+                                                    ", ".join("%s %d" % (snake.name, snake.points) for snake in arena.snakes))
+
+if __name__ == '__main__':
+    main()
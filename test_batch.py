@@ -0,0 +1,137 @@
+"""
+Checks that batch.BatchArena plays by exactly the rules of engine.Arena.
+
+Every game of a batch is played in lockstep with an Arena that puts its food
+on the cells the batch chose, and the two are compared after every tick:
+grid, snakes, food, game over and winner.
+
+    python -m unittest test_batch
+"""
+import random
+import unittest
+
+import numpy
+
+import batch
+from batch import BatchArena
+from engine import Arena, DIRECTIONS, EMPTY, FOOD, FOOD_COLOR, SNAKE_CODE
+
+
+class LoggedBatch(BatchArena):
+    """A BatchArena that keeps the cells each arena's food went to, in order, -1 when there was no room"""
+    def __init__(self, count, grid_size, option, seed):
+        self.placed = dict((arena, []) for arena in xrange(count))
+        BatchArena.__init__(self, count, grid_size, option, seed=seed)
+
+    def place_food(self, arenas):
+        before = self.grid[arenas] == EMPTY
+        BatchArena.place_food(self, arenas)
+        placed = before & (self.grid[arenas] == FOOD)
+        for arena, row in zip(arenas, placed):
+            cells = numpy.flatnonzero(row)
+            self.placed[int(arena)].append(int(cells[0]) if len(cells) else -1)
+
+
+class ScriptedArena(Arena):
+    """
+    An Arena that puts its food on the cells of a list, in order, instead of random ones, checking that every head
+    has claimed its cell when food is made
+    """
+    def __init__(self, grid_size, option, cells):
+        self.script = cells # read as the food is made, so it can grow while the game is played
+        self.made = 0
+        Arena.__init__(self, grid_size, option, [0] * option, 0)
+
+    def make_food(self):
+        for snake in self.snakes:
+            head = snake.body_parts[0]
+            if snake.alive and self.in_bounds(head.row, head.col):
+                assert self.cell_at(head.row, head.col) >= SNAKE_CODE, "food made before a head claimed its cell"
+        index = self.script[self.made]
+        self.made += 1
+        if index < 0:
+            return None
+        row, col = divmod(index, self.grid_size[1])
+        bite = self.new_body(row, col, FOOD_COLOR)
+        self.food.append(bite)
+        self.food_cells[index] = bite
+        self.set_cell(index, FOOD)
+        return bite
+
+
+def steer(games, rng, turn, safe):
+    """
+    Returns direction indices for the snakes of the batch: mostly straight on, turning at random with
+    probability turn, and if safe away from walls and snakes when there is a way out
+    """
+    rows, cols = games.grid_size
+    directions = numpy.array(games.direction, dtype=numpy.int64)
+    for arena in xrange(games.count):
+        for p in xrange(games.option):
+            if rng.random() < turn:
+                directions[arena, p] = rng.randrange(len(DIRECTIONS))
+            if not safe or not games.alive[arena, p]:
+                continue
+            row, col = divmod(int(games.body[arena, p, games.head[arena, p]]), cols)
+            ways = [d for d, (drow, dcol) in enumerate(DIRECTIONS)
+                    if 0 <= row + drow < rows and 0 <= col + dcol < cols
+                    and games.grid[arena, (row + drow) * cols + col + dcol] < SNAKE_CODE]
+            if ways and directions[arena, p] not in ways:
+                directions[arena, p] = rng.choice(ways)
+    return directions
+
+
+class LockstepTest(unittest.TestCase):
+    longMessage = True
+
+    def play(self, count, grid_size, option, ticks, seed, turn=0.3, safe=False):
+        games = LoggedBatch(count, grid_size, option, seed)
+        arenas = [ScriptedArena(grid_size, option, games.placed[arena]) for arena in xrange(count)]
+        rng = random.Random(seed)
+        for tick in xrange(ticks):
+            directions = steer(games, rng, turn, safe)
+            games.step(directions)
+            over = games.game_over()
+            winners = games.winner()
+            for i, arena in enumerate(arenas):
+                if arena.game_over():
+                    continue
+                arena.tick([DIRECTIONS[d] for d in directions[i]])
+                where = "tick %d, arena %d" % (tick, i)
+                self.assertEqual(bytes(bytearray(games.grid[i])), bytes(arena.grid), where)
+                _, batch_snakes, batch_food = games.get_state(i)
+                _, snakes, food = arena.get_state()
+                for got, expected in zip(batch_snakes, snakes):
+                    if expected[0]:
+                        self.assertEqual(got, expected, where)
+                    else: # the batch forgets the cells of a snake that lost
+                        self.assertEqual(got[:4], expected[:4], where)
+                self.assertEqual(sorted(batch_food), sorted(food), where)
+                self.assertEqual(bool(over[i]), arena.game_over(), where)
+                winner = arena.winner()
+                self.assertEqual(winners[i], arena.snakes.index(winner) if winner else -1, where)
+
+    def test_two_snakes(self):
+        self.play(50, (12,12), 2, 300, 1)
+
+    def test_one_snake(self):
+        self.play(50, (10,10), 1, 300, 2, turn=0.1)
+
+    def test_snakes_in_lanes(self):
+        self.play(20, (40,40), 8, 300, 3, turn=0.05)
+
+    def test_long_games(self):
+        self.play(100, (12,12), 1, 1500, 7, safe=True)
+        self.play(100, (12,12), 2, 1500, 8, safe=True)
+
+    def test_food_from_empty_cells(self):
+        tries = batch.FOOD_TRIES
+        batch.FOOD_TRIES = 0 # every bite comes from the fallback that chooses among the empty cells
+        try:
+            self.play(200, (12,12), 3, 800, 6)
+        finally:
+            batch.FOOD_TRIES = tries
+
+
+if __name__ == '__main__':
+    unittest.main()
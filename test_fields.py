@@ -0,0 +1,70 @@
+"""
+Checks the fields of fields.py, kept up to date tick by tick, against fields
+built from scratch.
+
+Games are played with computer snakes, and after every tick and every reset
+the distances have to be the same as those of a new Fields of the arena, and
+the regions have to split the free cells the same way with the same sizes,
+whatever their labels.
+
+    python -m unittest test_fields
+"""
+import random
+import unittest
+
+from bots import greedy_policy, random_policy
+from engine import Arena
+from fields import Fields, NO_REGION, for_arena
+
+
+class FieldsTest(unittest.TestCase):
+    longMessage = True
+
+    def assertSameFields(self, fields, where):
+        fresh = Fields(fields.arena)
+        fields.arena.unwatch(fresh.written)
+        self.assertEqual(fields.distance, fresh.distance, where)
+        labels = {} # label of fields -> label of fresh
+        for label, fresh_label in zip(fields.region, fresh.region):
+            self.assertEqual(label == NO_REGION, fresh_label == NO_REGION, where)
+            if label != NO_REGION:
+                self.assertEqual(labels.setdefault(label, fresh_label), fresh_label, where)
+        self.assertEqual(len(set(labels.itervalues())), len(labels), where) # no two regions where fresh has one
+        self.assertEqual(set(fields.sizes), set(labels), where)
+        for label, fresh_label in labels.iteritems():
+            self.assertEqual(fields.sizes[label], fresh.sizes[fresh_label], where)
+
+    def play(self, grid_size, option, ticks, seed, policy, turn=0.0):
+        arena = Arena(grid_size, option, [0] * option, seed)
+        fields = for_arena(arena)
+        self.assertIs(for_arena(arena), fields)
+        rng = random.Random(seed)
+        for tick in xrange(ticks):
+            directions = []
+            for snake in arena.snakes:
+                direction = policy(arena, snake, rng) if snake.alive else snake.direction
+                if rng.random() < turn:
+                    direction = rng.choice([(0,1), (0,-1), (1,0), (-1,0)])
+                directions.append(direction)
+            arena.tick(directions)
+            fields.update()
+            self.assertSameFields(fields, "tick %d" % tick)
+            if arena.game_over():
+                arena.reset([0] * option)
+                fields.update()
+                self.assertSameFields(fields, "reset at tick %d" % tick)
+
+    def test_random_snakes(self):
+        self.play((12,12), 2, 2000, 1, random_policy)
+        self.play((20,20), 4, 1500, 2, random_policy, turn=0.05)
+
+    def test_greedy_snakes(self):
+        self.play((25,25), 1, 1500, 4, greedy_policy)
+        self.play((16,16), 3, 1500, 6, greedy_policy)
+
+    def test_snakes_in_lanes(self):
+        self.play((30,30), 12, 800, 5, random_policy, turn=0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
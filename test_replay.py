@@ -0,0 +1,75 @@
+"""
+Checks that replays play games back exactly, from the start and from any tick.
+
+Games are recorded with keyframes a few ticks apart, keeping the state of the
+arena after every tick.  Playing the replay through has to end in the last
+state, and seeking has to land in the state of the tick asked for, in
+particular at tick 0, on both sides of each keyframe and at the last tick.
+
+    python -m unittest test_replay
+"""
+import random
+import unittest
+
+from bots import greedy_policy, random_policy
+from engine import Arena
+from replay import KEYFRAME_INTERVAL, Recorder, Replay, play
+
+
+def record(arena, policy, seed, keyframe_interval, ticks):
+    """Plays a game on arena for at most ticks ticks; returns its replay and the state after every tick, from 0"""
+    recorder = Recorder(arena, 10, keyframe_interval)
+    rng = random.Random(seed)
+    states = [arena.get_state()]
+    while not arena.game_over() and len(states) <= ticks:
+        directions = [policy(arena, snake, rng) if snake.alive else snake.direction for snake in arena.snakes]
+        recorder.record(directions)
+        arena.tick(directions)
+        states.append(arena.get_state())
+    return Replay(bytes(recorder.finish())), states
+
+
+class ReplayTest(unittest.TestCase):
+    longMessage = True
+
+    def check(self, arena, policy, seed, keyframe_interval, ticks=100000):
+        replay, states = record(arena, policy, seed, keyframe_interval, ticks)
+        last = len(states) - 1
+        self.assertEqual(play(replay).get_state(), states[last])
+        self.assertEqual(replay.keyframe_ticks, range(keyframe_interval, last, keyframe_interval)
+                         if keyframe_interval > 0 else [])
+        seeks = set([0, 1, last - 1, last])
+        for tick in replay.keyframe_ticks:
+            seeks.update((tick - 1, tick, tick + 1))
+        reused = replay.new_arena()
+        for tick in sorted(seeks):
+            if 0 <= tick <= last:
+                self.assertEqual(replay.seek(tick).get_state(), states[tick], "seek to %d of %d" % (tick, last))
+                self.assertEqual(replay.seek(tick, reused).get_state(), states[tick], "seek to %d reusing" % tick)
+        self.assertEqual(replay.seek(last + 10).get_state(), states[last]) # past the end stops at the end
+
+    def test_one_snake(self):
+        for seed in xrange(5):
+            self.check(Arena((12,12), 1, [0], seed), greedy_policy, seed, 25)
+
+    def test_snakes(self):
+        for seed in xrange(5):
+            self.check(Arena((20,20), 3, [0, 30, 0], seed), greedy_policy, seed, 10)
+
+    def test_default_keyframes(self):
+        self.check(Arena((40,40), 1, [0], 7), greedy_policy, 7, KEYFRAME_INTERVAL)
+
+    def test_no_keyframes(self):
+        self.check(Arena((20,20), 2, [0, 0], 3), greedy_policy, 3, 0)
+
+    def test_no_keyframes_on_big_boards(self):
+        replay, states = record(Arena((250,250), 2, [0, 0], 1), greedy_policy, 1, 10, 40)
+        self.assertEqual(replay.keyframe_ticks, [])
+        self.assertEqual(replay.seek(25).get_state(), states[25])
+
+    def test_many_snakes(self):
+        self.check(Arena((120,120), 70, [0] * 70, 5), random_policy, 5, 7, 60) # two bytes per change
+
+
+if __name__ == '__main__':
+    unittest.main()
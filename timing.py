@@ -0,0 +1,87 @@
+"""
+Clock that runs the simulation at a fixed tick rate, independently of how
+often the screen is drawn.
+
+The render loop hands it the real time that passed each frame.  It reports
+how many simulation ticks are due, and how far the game is between the last
+tick and the next one, so the renderer can interpolate.
+
+LatencyMeter measures the time from a key press to the first frame that shows
+the snake turning, and StageTimer how long each step of starting up took.
+"""
+from collections import deque
+from timeit import default_timer
+
+
+MAX_BACKLOG = 0.25 # seconds of simulation that can pile up, e.g. while the window is dragged
+
+class FixedStepClock:
+    def __init__(self, tick_rate, max_backlog=MAX_BACKLOG):
+        self.step = 1.0 / tick_rate
+        self.max_backlog = max(max_backlog, 2 * self.step)
+        self.accumulated = 0.0
+        self.ticks = 0
+
+    def add_time(self, seconds):
+        self.accumulated = min(self.accumulated + seconds, self.max_backlog)
+
+    def tick_due(self):
+        """Returns true, and uses up one step, if a simulation tick should run now"""
+        if self.accumulated >= self.step:
+            self.accumulated -= self.step
+            self.ticks += 1
+            return True
+        return False
+
+    def alpha(self):
+        """How far between the last tick and the next one the game is, from 0 to 1"""
+        return self.accumulated / self.step
+
+
+def percentile(values, fraction):
+    """Returns the value below which the given fraction (0 to 1) of the sorted values lie"""
+    if not values:
+        return 0
+    index = min(int(fraction * len(values)), len(values) - 1)
+    return values[index]
+
+class LatencyMeter:
+    def __init__(self, max_samples=1000):
+        self.samples = deque(maxlen=max_samples) # milliseconds from key press to display, most recent last
+        self.waiting = [] # press times of turns that were applied but not shown yet
+
+    def applied(self, pressed):
+        """Records that a turn pressed at the given time (in ms) was applied by a tick"""
+        if pressed is not None:
+            self.waiting.append(pressed)
+
+    def presented(self, now):
+        """Records that a frame was put on the screen at the given time (in ms)"""
+        for pressed in self.waiting:
+            self.samples.append(now - pressed)
+        self.waiting = []
+
+    def summary(self):
+        values = sorted(self.samples)
+        return {'count': len(values),
+                'p50': percentile(values, 0.5),
+                'p95': percentile(values, 0.95),
+                'max': values[-1] if values else 0}
+
+
+class StageTimer:
+    """Records how long each stage of a sequence of steps, like starting the game, took"""
+    def __init__(self, start=None):
+        self.start = default_timer() if start is None else start
+        self.last = self.start
+        self.stages = [] # (stage, seconds) in order
+
+    def mark(self, stage):
+        """Ends a stage, which took the time since the previous mark (or the start)"""
+        now = default_timer()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def report(self, title):
+        parts = ["%s %d ms" % (stage, seconds * 1000) for stage, seconds in self.stages]
+        return "%s in %d ms: %s" % (title, (self.last - self.start) * 1000, ", ".join(parts))
@@ -0,0 +1,249 @@
+"""
+Plays tournaments between the computer players of bots.py on every core.
+
+Each game puts two bots on a headless engine.Arena seeded for it, so the food
+falls the same way whenever the game is played again.  PathBot plays with no
+time budget, its search bounded by bots.SEARCH_CELLS instead, so no bot
+depends on the speed of the machine and the same seed gives the same results.  A game ends when
+detect_collisions returns the snake that lost, or None for a tie, or after
+max_ticks with both snakes still going, which is a tie too.  The games of a
+pairing take turns giving each bot the first snake, which moves first.  A
+round robin plays every pairing once; a Swiss tournament plays rounds that
+pair bots with similar scores, avoiding rematches while it can.
+
+The games are handed to a multiprocessing pool one at a time and only a
+small dictionary comes back from each, so the games per second grow with the
+number of cores.  Every result is written to the results file as a line of
+JSON as soon as it comes in, so a long tournament can be followed with tail -f
+and loses nothing when stopped.  The standings give wins, ties and losses and
+the score (1 for a win, 0.5 for a tie) and points per game with 95% confidence
+intervals.
+
+    python tournament.py --games 50
+    python tournament.py --format swiss --rounds 5 --bots path field greedy
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import time
+
+from engine import Arena
+from bots import POLICIES, PathBot, make_policy
+
+
+GAMES = 20 # games per pairing
+SWISS_ROUNDS = 3
+MAX_TICKS = 10000 # a game still going after this many ticks is a tie
+CONFIDENCE_Z = 1.96 # normal quantile of the confidence intervals, 95%
+WIN_SCORE = 1.0
+TIE_SCORE = 0.5
+DEFAULT_OUT = 'tournament.jsonl'
+
+
+def tournament_policy(name):
+    """Returns a new policy of the given name from POLICIES, a PathBot without a time budget"""
+    if POLICIES[name] is PathBot:
+        return PathBot(budget=None)
+    return make_policy(name)
+
+def play_game(job):
+    """
+    Plays the game job = (round, names, seed, grid_size, max_ticks), where snake i is steered by POLICIES[names[i]]
+    Returns its result as a dictionary that can be written as JSON; winner is the index of the winning snake or None
+    """
+    number, names, seed, grid_size, max_ticks = job
+    arena = Arena(grid_size, len(names), [0] * len(names), seed)
+    policies = [tournament_policy(name) for name in names]
+    for policy in policies:
+        if hasattr(policy, 'prepare'):
+            policy.prepare(arena)
+    rng = random.Random(seed)
+    loser = False
+    ticks = 0
+    while loser is False and ticks < max_ticks:
+        directions = [policy(arena, snake, rng) for policy, snake in zip(policies, arena.snakes)]
+        loser = arena.tick(directions)
+        ticks += 1
+    winner = None
+    if loser:
+        winner = 1 - arena.snakes.index(loser)
+    return {'round': number,
+            'bots': list(names),
+            'seed': seed,
+            'winner': winner,
+            'timeout': loser is False,
+            'points': [snake.points for snake in arena.snakes],
+            'ticks': ticks}
+
+def interval(total, squares, count):
+    """Returns the mean of count values from their sum and sum of squares, and the half width of its confidence interval"""
+    if count == 0:
+        return 0.0, float('inf')
+    mean = float(total) / count
+    if count == 1:
+        return mean, float('inf')
+    variance = max(squares - total * mean, 0.0) / (count - 1)
+    return mean, CONFIDENCE_Z * math.sqrt(variance / count)
+
+
+class Record:
+    """Results of one bot, with running sums so a tournament of any length takes the same memory"""
+    def __init__(self, name):
+        self.name = name
+        self.wins = 0
+        self.ties = 0
+        self.losses = 0
+        self.score = 0.0
+        self.score_squares = 0.0
+        self.points = 0
+        self.points_squares = 0
+
+    def games(self):
+        return self.wins + self.ties + self.losses
+
+    def add(self, score, points):
+        if score == WIN_SCORE:
+            self.wins += 1
+        elif score == TIE_SCORE:
+            self.ties += 1
+        else:
+            self.losses += 1
+        self.score += score
+        self.score_squares += score * score
+        self.points += points
+        self.points_squares += points * points
+
+    def mean_score(self):
+        return self.score / self.games() if self.games() else 0.0
+
+    def summary(self):
+        score, score_error = interval(self.score, self.score_squares, self.games())
+        points, points_error = interval(self.points, self.points_squares, self.games())
+        return {'bot': self.name, 'games': self.games(), 'wins': self.wins, 'ties': self.ties, 'losses': self.losses,
+                'score': score, 'score_error': score_error, 'points': points, 'points_error': points_error}
+
+
+class Standings:
+    def __init__(self, names):
+        self.records = dict((name, Record(name)) for name in names)
+        self.met = set() # frozensets of the bots of every pairing played
+
+    def add(self, result):
+        for i, name in enumerate(result['bots']):
+            if result['winner'] is None:
+                score = TIE_SCORE
+            elif result['winner'] == i:
+                score = WIN_SCORE
+            else:
+                score = 0.0
+            self.records[name].add(score, result['points'][i])
+        self.met.add(frozenset(result['bots']))
+
+    def mean_score(self, name):
+        return self.records[name].mean_score()
+
+    def table(self):
+        """Returns the summary of every bot, best score first"""
+        records = sorted(self.records.itervalues(), key=lambda record: -record.mean_score())
+        return [record.summary() for record in records]
+
+
+def round_robin(names):
+    """Returns every pairing of the bots"""
+    return [(a, b) for i, a in enumerate(names) for b in names[i+1:]]
+
+def swiss_pairs(names, standings):
+    """
+    Pairs each bot, best score first, with the next best one it has not met yet, or the next best if it has met
+    them all; with an odd number of bots the last one sits the round out
+    """
+    order = sorted(names, key=lambda name: -standings.mean_score(name))
+    pairs = []
+    while len(order) > 1:
+        first = order.pop(0)
+        other = 0
+        for i, name in enumerate(order):
+            if frozenset((first, name)) not in standings.met:
+                other = i
+                break
+        pairs.append((first, order.pop(other)))
+    return pairs
+
+def games_of(number, pairs, games, seeds, grid_size, max_ticks):
+    """Returns the jobs for play_game of a round, swapping which bot moves first every game"""
+    jobs = []
+    for pair in pairs:
+        for game in xrange(games):
+            names = pair if game % 2 == 0 else pair[::-1]
+            jobs.append((number, names, seeds.getrandbits(32), grid_size, max_ticks))
+    return jobs
+
+def run(names, games=GAMES, swiss_rounds=None, grid_size=(40,40), max_ticks=MAX_TICKS, seed=None, out=None,
+        processes=None):
+    """
+    Plays a round robin between the named bots, or swiss_rounds Swiss rounds if given, on a pool of processes
+    (one per core unless given), writing every result to the file out as it finishes
+    Returns a dictionary with the number of games and ticks played, the games per second and the standings
+    """
+    seeds = random.Random(seed)
+    standings = Standings(names)
+    played = 0
+    ticks = 0
+    pool = multiprocessing.Pool(processes)
+    start = time.time()
+    try:
+        for number in xrange(swiss_rounds or 1):
+            pairs = swiss_pairs(names, standings) if swiss_rounds else round_robin(names)
+            jobs = games_of(number, pairs, games, seeds, grid_size, max_ticks)
+            for result in pool.imap_unordered(play_game, jobs):
+                standings.add(result)
+                played += 1
+                ticks += result['ticks']
+                if out is not None:
+                    out.write(json.dumps(result) + '\n')
+                    out.flush()
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    seconds = time.time() - start
+    return {'games': played,
+            'ticks': ticks,
+            'seconds': seconds,
+            'games_per_sec': played / seconds if seconds > 0 else float('inf'),
+            'standings': standings.table()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a tournament between computer players on every core")
+    parser.add_argument('--bots', nargs='+', choices=sorted(POLICIES), default=sorted(POLICIES))
+    parser.add_argument('--format', choices=['round-robin', 'swiss'], default='round-robin')
+    parser.add_argument('--rounds', type=int, default=SWISS_ROUNDS, help="rounds of a Swiss tournament")
+    parser.add_argument('--games', type=int, default=GAMES, help="games per pairing")
+    parser.add_argument('--rows', type=int, default=40)
+    parser.add_argument('--cols', type=int, default=40)
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS, help="ticks after which a game is a tie")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--jobs', type=int, default=None, help="processes to play on, one per core by default")
+    parser.add_argument('--out', default=DEFAULT_OUT, help="file the result of every game is written to as JSON lines")
+    args = parser.parse_args()
+    if len(set(args.bots)) < 2:
+        parser.error("a tournament needs at least two different bots")
+
+    swiss_rounds = args.rounds if args.format == 'swiss' else None
+    with open(args.out, 'w') as out:
+        stats = run(sorted(set(args.bots)), args.games, swiss_rounds, (args.rows, args.cols), args.max_ticks,
+                    args.seed, out, args.jobs)
+    print "%d games, %d ticks in %.2fs (%.1f games/sec)" % (stats['games'], stats['ticks'], stats['seconds'],
+                                                          stats['games_per_sec'])
+    print "%-8s %6s %5s %5s %5s %15s %17s" % ('bot', 'games', 'wins', 'ties', 'lost', 'score', 'points')
+    for row in stats['standings']:
+        print "%-8s %6d %5d %5d %5d %7.3f +- %.3f %8.1f +- %5.1f" % (row['bot'], row['games'], row['wins'], row['ties'],
+                                                                   row['losses'], row['score'], row['score_error'],
+                                                                   row['points'], row['points_error'])
+
+if __name__ == '__main__':
+    main()
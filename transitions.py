@@ -0,0 +1,81 @@
+"""
+Countdown shown before a game.
+
+Each message is rendered once and faded in at the center of the screen.  How
+far the fade has got comes from the time that passed, not from the number of
+frames drawn, so a slow display drops frames instead of taking longer.  Only
+the rectangle of the message is redrawn and sent to the display, and a key
+press skips the rest of the countdown.
+"""
+import pygame
+from timeit import default_timer
+
+from assets import get_font
+
+
+COUNTDOWN = ("3", "2", "1", "GO")
+COUNTDOWN_SIZE = 200
+FADE_SECONDS = 0.5 # time each message takes to fade in
+FADE_FPS = 60
+
+_messages = {}
+
+def message_surface(text, size, color, background):
+    """Returns the rendered message, made once; not from the text cache because its alpha gets changed"""
+    key = (text, size, color, background)
+    surface = _messages.get(key)
+    if surface is None:
+        surface = get_font(size).render(text, True, color, background)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        _messages[key] = surface
+    return surface
+
+class Fade:
+    """Fades a message in over the given number of seconds, centered on the screen"""
+    def __init__(self, screen, surface, seconds=FADE_SECONDS):
+        self.surface = surface
+        self.seconds = seconds
+        self.rect = surface.get_rect()
+        self.rect.center = screen.get_rect().center
+        self.start = None
+
+    def draw(self, screen, now, background):
+        """Draws the message as far faded in as it should be at time now; returns true once it is fully shown"""
+        if self.start is None:
+            self.start = now
+        fraction = min((now - self.start) / self.seconds, 1.0) if self.seconds > 0 else 1.0
+        screen.fill(background, self.rect)
+        self.surface.set_alpha(int(255 * fraction))
+        screen.blit(self.surface, self.rect)
+        return fraction >= 1.0
+
+"""
+Fades in each message in turn on a screen cleared to the background color
+Returns True when the countdown is over, whether it ran to the end or a key skipped it, or False if the
+window was closed
+"""
+def countdown(screen, clock, color, messages=COUNTDOWN, seconds=FADE_SECONDS, background=(0,0,0)):
+    screen.fill(background)
+    pygame.display.flip()
+    shown = None # rect of the last message, cleared when the next one starts
+    for text in messages:
+        fade = Fade(screen, message_surface(text, COUNTDOWN_SIZE, color, background), seconds)
+        done = False
+        while not done:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return False
+                elif event.type == pygame.KEYDOWN:
+                    return True
+            rects = []
+            if shown is not None and shown != fade.rect:
+                screen.fill(background, shown)
+                rects.append(shown)
+            done = fade.draw(screen, default_timer(), background)
+            shown = fade.rect
+            rects.append(fade.rect)
+            pygame.display.update(rects)
+            if not done:
+                clock.tick(FADE_FPS)
+    return True